@@ -1,36 +1,16 @@
 #!/bin/bash
 
-echo "Starting parallel downloads..."
-
-echo "Downloading 船井電機株式会社 data..." &
-uv run python src/edinet2dataset/downloader.py --start_date 2020-01-01 --end_date 2024-12-31 --company_name "船井電機株式会社" --doc_type annual &
-
-echo "Downloading 日本電解株式会社 data..." &
-uv run python src/edinet2dataset/downloader.py --start_date 2020-01-01 --end_date 2024-12-31 --company_name "日本電解株式会社" --doc_type annual &
-
-echo "Downloading 株式会社ガイアックス data..." &
-uv run python src/edinet2dataset/downloader.py --start_date 2020-01-01 --end_date 2024-12-31 --company_name "株式会社ガイアックス" --doc_type annual &
-
-echo "Downloading ユニゾホールディングス株式会社 data..." &
-uv run python src/edinet2dataset/downloader.py --start_date 2020-01-01 --end_date 2024-12-31 --company_name "ユニゾホールディングス株式会社" --doc_type annual &
-
-echo "Downloading 株式会社アイ・テック data..." &
-uv run python src/edinet2dataset/downloader.py --start_date 2020-01-01 --end_date 2024-12-31 --company_name "株式会社アイ・テック" --doc_type annual &
-
-echo "Downloading 株式会社レナウン data..." &
-uv run python src/edinet2dataset/downloader.py --start_date 2020-01-01 --end_date 2024-12-31 --company_name "株式会社レナウン" --doc_type annual &
-
-echo "Downloading 株式会社ベクトル data..." &
-uv run python src/edinet2dataset/downloader.py --start_date 2020-01-01 --end_date 2024-12-31 --company_name "株式会社ベクトル" --doc_type annual &
-
-echo "Downloading 株式会社　オーテック data..." &
-uv run python src/edinet2dataset/downloader.py --start_date 2020-01-01 --end_date 2024-12-31 --company_name "株式会社　オーテック" --doc_type annual &
-
-echo "Downloading ＳＢＩ　ＦｉｎＴｅｃｈ　Ｓｏｌｕｔｉｏｎｓ株式会社 data..." &
-uv run python src/edinet2dataset/downloader.py --start_date 2020-01-01 --end_date 2024-12-31 --company_name "ＳＢＩ　ＦｉｎＴｅｃｈ　Ｓｏｌｕｔｉｏｎｓ株式会社" --doc_type annual &
-
-echo "Waiting for all downloads to complete..."
-wait
+echo "Downloading 9 companies..."
+uv run python src/edinet2dataset/downloader.py --start_date 2020-01-01 --end_date 2024-12-31 --doc_type annual --company_name \
+    "船井電機株式会社" \
+    "日本電解株式会社" \
+    "株式会社ガイアックス" \
+    "ユニゾホールディングス株式会社" \
+    "株式会社アイ・テック" \
+    "株式会社レナウン" \
+    "株式会社ベクトル" \
+    "株式会社　オーテック" \
+    "ＳＢＩ　ＦｉｎＴｅｃｈ　Ｓｏｌｕｔｉｏｎｓ株式会社"
 
 echo "All downloads completed!"
 
@@ -2,11 +2,12 @@ import os
 import glob
 import random
 import polars as pl
-from concurrent.futures import ThreadPoolExecutor
 from argparse import ArgumentParser
 from tqdm import tqdm
 import json
-from edinet2dataset.parser import Parser, parse_tsv
+from edinet2dataset.cache import ParseCache
+from edinet2dataset.parser import FinancialData, Parser, add_typed_values, parse_many
+from edinet2dataset.reader import read_report
 from loguru import logger
 import datasets
 from typing import Optional
@@ -71,16 +72,17 @@ def get_consecutive_2_years(data_dir: str) -> list[dict]:
 
 
 def extract_profit(file_path: str, year: str) -> Optional[int]:
-    parser = Parser()
-    df = pl.read_csv(
-        file_path, separator="\t", encoding="utf-16", infer_schema_length=0
-    )
-    df = parser.unique_element_list(df)
-    for element_id in [
+    df = read_report(file_path)
+    element_ids = [
         "ProfitLossAttributableToOwnersOfParent",
         "ProfitLossAttributableToOwnersOfParentCompanyIFRS",
-    ]:
-        df_filtered = parser.filter_by_element_id(df, element_id)
+    ]
+    df = Parser.filter_by_element_ids(df, element_ids)
+    df = Parser.unique_element_list(df)
+    for element_id in element_ids:
+        df_filtered = df.filter(
+            pl.col("local_name").is_in([element_id, f"{element_id}IFRS"])
+        )
         if df_filtered.shape[0] > 0:
             df = df_filtered
             break
@@ -88,26 +90,29 @@ def extract_profit(file_path: str, year: str) -> Optional[int]:
         logger.error(f"ProfitLoss not found in {file_path}")
         return None
 
-    df = parser.filter_by_year(df, year)
+    df = Parser.filter_by_year(df, year)
     if df.shape[0] != 1:
         logger.error(f"df shape is not 1 in {file_path}")
         return None
 
-    return int(df["値"].to_numpy()[0])
+    return add_typed_values(df)["整数値"][0]
 
 
 def is_profit_increase(previous: int, current: int) -> bool:
     return current > previous
 
 
-def process_single_company(previous_tsv: str, current_tsv: str) -> Optional[dict]:
+def process_single_company(
+    previous_tsv: str,
+    current_tsv: str,
+    previous_financial_data: Optional[FinancialData],
+) -> Optional[dict]:
     prior2year_profit = extract_profit(previous_tsv, "Prior1Year")
     prior1year_profit = extract_profit(previous_tsv, "CurrentYear")
     current_profit = extract_profit(current_tsv, "CurrentYear")
     if None in (prior2year_profit, prior1year_profit, current_profit):
         return None
 
-    previous_financial_data = parse_tsv(previous_tsv)
     if not previous_financial_data:
         logger.warning(f"Failed to parse {previous_tsv}")
         return None
@@ -146,6 +151,12 @@ def parse_args():
     parser.add_argument("--input_dir", type=str, default="edinet_corpus/annual")
     parser.add_argument("--output_path", type=str, default="dataset/earnings_forecast")
     parser.add_argument("--num_workers", type=int, default=8)
+    parser.add_argument(
+        "--cache_path",
+        type=str,
+        default=None,
+        help="SQLite file to cache parsed reports in across runs",
+    )
     parser.add_argument("--num_example", type=int, default=1000)
     parser.add_argument("--balance_class", action="store_true")
     return parser.parse_args()
@@ -157,10 +168,7 @@ def main():
     edinet_dirs = glob.glob(os.path.join(args.input_dir, "*"))
     random.shuffle(edinet_dirs)
 
-    results = []
-
-    progress_bar = tqdm(total=args.num_example, desc="Valid results collected")
-
+    pairs = []
     for dir in edinet_dirs:
         pair_list = get_consecutive_2_years(dir)
         if not pair_list:
@@ -175,20 +183,36 @@ def main():
             logger.error(f"File not found: {pair['CurrentYearPath']}")
             continue
         logger.info(f"Sampled pair: {pair}")
+        pairs.append(pair)
+
+    results = []
+
+    progress_bar = tqdm(total=args.num_example, desc="Valid results collected")
 
-        with ThreadPoolExecutor(max_workers=args.num_workers) as executor:
-            future = executor.submit(
-                process_single_company,
-                pair["PreviousYearPath"],
-                pair["CurrentYearPath"],
+    # Parse in input order so the sampled examples stay deterministic; the
+    # pool is shut down as soon as enough examples have been collected.
+    cache = ParseCache(args.cache_path) if args.cache_path else None
+    parse_results = parse_many(
+        [pair["PreviousYearPath"] for pair in pairs],
+        workers=args.num_workers,
+        cache=cache,
+    )
+    for pair, parse_result in zip(pairs, parse_results):
+        if not parse_result.ok:
+            logger.warning(
+                f"Failed to parse {parse_result.file_path}: {parse_result.error}"
             )
-            result = future.result()
-            if result:
-                results.append(result)
-                progress_bar.update(1)
+            continue
+        result = process_single_company(
+            pair["PreviousYearPath"], pair["CurrentYearPath"], parse_result.data
+        )
+        if result:
+            results.append(result)
+            progress_bar.update(1)
 
         if len(results) >= args.num_example:
             break
+    parse_results.close()
 
     progress_bar.close()
 
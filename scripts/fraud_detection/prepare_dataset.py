@@ -7,8 +7,8 @@ import datasets
 import pandas as pd
 from loguru import logger
 
-from edinet2dataset.parser import parse_tsv
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from edinet2dataset.cache import ParseCache
+from edinet2dataset.parser import FinancialData, parse_many
 
 from tqdm import tqdm
 from sklearn.model_selection import train_test_split
@@ -36,8 +36,12 @@ def load_fraud_explanation(analysis_path: str) -> dict[str, dict]:
     return explanation_table
 
 
-def build_data_entry(tsv_path: str, label: int, explanation_table: dict) -> dict:
-    financial_data = parse_tsv(tsv_path)
+def build_data_entry(
+    tsv_path: str,
+    financial_data: FinancialData | None,
+    label: int,
+    explanation_table: dict,
+) -> dict:
     if not financial_data:
         logger.warning(f"Failed to parse {tsv_path}")
         return {}
@@ -81,35 +85,46 @@ def gather_all_tsv_files(base_dir: str) -> list[tuple[str, int]]:
     return all_files
 
 
-def process_all_reports_parallel(base_dir: str, explanation_table: dict) -> list[dict]:
+def process_all_reports_parallel(
+    base_dir: str,
+    explanation_table: dict,
+    num_workers: int | None = None,
+    cache: ParseCache | None = None,
+) -> list[dict]:
     entries = []
-    tsv_files_with_labels = gather_all_tsv_files(base_dir)
-
-    with ThreadPoolExecutor() as executor:
-        futures = {
-            executor.submit(build_data_entry, tsv_file, label, explanation_table): (
-                tsv_file,
-                label,
+    labels = dict(gather_all_tsv_files(base_dir))
+
+    for parse_result in tqdm(
+        parse_many(labels, workers=num_workers, ordered=False, cache=cache),
+        total=len(labels),
+        desc="Processing all reports",
+    ):
+        if not parse_result.ok:
+            logger.error(
+                f"Error processing {parse_result.file_path}: {parse_result.error}"
             )
-            for tsv_file, label in tsv_files_with_labels
-        }
-
-        for future in tqdm(
-            as_completed(futures), total=len(futures), desc="Processing all reports"
-        ):
-            tsv_file, _ = futures[future]
-            try:
-                entry = future.result()
-                if entry:
-                    entries.append(entry)
-            except Exception as e:
-                logger.error(f"Error processing {tsv_file}: {e}")
+            continue
+        entry = build_data_entry(
+            parse_result.file_path,
+            parse_result.data,
+            labels[parse_result.file_path],
+            explanation_table,
+        )
+        if entry:
+            entries.append(entry)
 
     return entries
 
 
-def create_dataset(base_dir: str, explanation_table: dict) -> datasets.Dataset:
-    all_data = process_all_reports_parallel(base_dir, explanation_table)
+def create_dataset(
+    base_dir: str,
+    explanation_table: dict,
+    num_workers: int | None = None,
+    cache: ParseCache | None = None,
+) -> datasets.Dataset:
+    all_data = process_all_reports_parallel(
+        base_dir, explanation_table, num_workers, cache
+    )
     return datasets.Dataset.from_dict(
         {k: [d[k] for d in all_data] for k in all_data[0]}
     )
@@ -157,6 +172,18 @@ def parse_args() -> Namespace:
         default="fraud_detection/analysis/result.jsonl",
         help="Path to the analysis JSON file",
     )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=None,
+        help="Number of worker processes for parsing (default: CPU count)",
+    )
+    parser.add_argument(
+        "--cache_path",
+        type=str,
+        default=None,
+        help="SQLite file to cache parsed reports in across runs",
+    )
     return parser.parse_args()
 
 
@@ -170,7 +197,8 @@ def main():
     explanation_table = load_fraud_explanation(args.analysis_path)
     os.makedirs(args.output_dir, exist_ok=True)
 
-    dataset = create_dataset(args.base_dir, explanation_table)
+    cache = ParseCache(args.cache_path) if args.cache_path else None
+    dataset = create_dataset(args.base_dir, explanation_table, args.num_workers, cache)
     dataset = dataset.sort("edinet_code")
 
     dataset_dict = split_dataset_by_edinet_code(dataset)
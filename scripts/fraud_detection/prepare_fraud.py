@@ -14,8 +14,7 @@ from pdfminer.pdfpage import PDFPage
 from io import StringIO
 from edinet2dataset.downloader import Downloader
 import glob
-import polars as pl
-from edinet2dataset.parser import Parser
+from edinet2dataset.metadata import MetadataCatalog
 
 # Suppress specific pdfminer warning about text extraction
 logging.getLogger("pdfminer.pdfpage").setLevel(logging.ERROR)
@@ -54,16 +53,6 @@ def extract_text_with_pdfminer(pdf_path: str, max_pages: int = 4) -> str:
     return text
 
 
-def read_tsv_get_original_doc_id(tsv_path: str) -> str | None:
-    parser = Parser()
-    df = pl.read_csv(tsv_path, separator="\t", encoding="utf-16", infer_schema_length=0)
-    df = parser.unique_element_list(df)
-    df = parser.filter_by_element_id(
-        df, "IdentificationOfDocumentSubjectToAmendmentDEI"
-    )
-    return df["値"].to_numpy()[0] if df.shape[0] == 1 else None
-
-
 def create_amended_prompt(pdf_text: str) -> str:
     """Create prompt for Claude to analyze amended reports."""
     prompt = """
@@ -166,7 +155,7 @@ def get_response_from_llm(
     return response.content[0].text
 
 
-def judge_amended_pdf(pdf_path: str) -> dict | None:
+def judge_amended_pdf(pdf_path: str, original_doc_ids: dict[str, str]) -> dict | None:
     """Analyze a single amended PDF file to determine if it's related to accounting fraud."""
     doc_id = os.path.basename(pdf_path).split(".")[0]
     tsv_path = pdf_path.replace(".pdf", ".tsv")
@@ -174,7 +163,7 @@ def judge_amended_pdf(pdf_path: str) -> dict | None:
         logger.info(f"{tsv_path} not found")
         return None
 
-    original_doc_id = read_tsv_get_original_doc_id(tsv_path)
+    original_doc_id = original_doc_ids.get(doc_id)
     if not original_doc_id:
         logger.info(f"{doc_id}'s corredponding report does not exist.")
         return None
@@ -219,11 +208,20 @@ def judge_amended_batch(
     if args.limit is not None:
         amended_pdf_files = amended_pdf_files[: args.limit]
 
+    catalog = MetadataCatalog(args.catalog_path)
+    catalog.update(amended_dir)
+    original_doc_ids = dict(
+        catalog.filings(amended_dir)
+        .select("doc_id", "IdentificationOfDocumentSubjectToAmendmentDEI")
+        .drop_nulls()
+        .iter_rows()
+    )
+
     all_analyses = []
 
     with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
         futures = [
-            executor.submit(judge_amended_pdf, pdf_file)
+            executor.submit(judge_amended_pdf, pdf_file, original_doc_ids)
             for pdf_file in amended_pdf_files
         ]
 
@@ -284,6 +282,12 @@ def parse_args():
         default=None,
         help="Limit the number of documents to process (for debugging)",
     )
+    parser.add_argument(
+        "--catalog_path",
+        type=str,
+        default="data/metadata.sqlite",
+        help="Path of the metadata catalog",
+    )
     return parser.parse_args()
 
 
@@ -300,7 +304,10 @@ def main():
 
     # Step 2: Download original documents for fraud cases
     for case in tqdm(fraud_cases, desc="Preparing fraud dataset"):
-        download_original_report(case["original_doc_id"], args.output_dir)
+        try:
+            download_original_report(case["original_doc_id"], args.output_dir)
+        except Exception as e:
+            logger.error(f"Failed to download {case['original_doc_id']}: {e}")
 
 
 if __name__ == "__main__":
@@ -5,8 +5,7 @@ import shutil
 import logging
 from typing import List, Set
 from tqdm import tqdm
-from edinet2dataset.parser import Parser
-import polars as pl
+from edinet2dataset.metadata import MetadataCatalog
 from argparse import ArgumentParser
 
 logging.basicConfig(level=logging.INFO)
@@ -61,26 +60,12 @@ def get_nonfraud_doc_dirs(
     return nonfraud_dirs
 
 
-def get_fraud_edinet_codes(fraud_dir: str) -> Set[str]:
-    fraud_tsv_files = glob.glob(os.path.join(fraud_dir, "*.tsv"))
-    edinet_codes = set()
-    parser = Parser()
-
-    for fraud_file in fraud_tsv_files:
-        try:
-            df = pl.read_csv(
-                fraud_file, separator="\t", encoding="utf-16", infer_schema_length=0
-            )
-            edinet_code = (
-                parser.filter_by_element_id(df, "EDINETCodeDEI")
-                .select("値")
-                .to_numpy()[0][0]
-            )
-            logging.info(f"Extracted EDINET code: {edinet_code}")
-            edinet_codes.add(edinet_code)
-        except Exception as e:
-            logging.warning(f"Failed to read {fraud_file}: {e}")
-
+def get_fraud_edinet_codes(fraud_dir: str, catalog: MetadataCatalog) -> Set[str]:
+    catalog.update(fraud_dir)
+    edinet_codes = set(
+        catalog.filings(fraud_dir)["EDINETCodeDEI"].drop_nulls().to_list()
+    )
+    logging.info(f"Extracted EDINET codes: {sorted(edinet_codes)}")
     return edinet_codes
 
 
@@ -110,6 +95,12 @@ def parse_args():
         default=700,
         help="Number of non-fraud examples to sample",
     )
+    arg_parser.add_argument(
+        "--catalog_path",
+        type=str,
+        default="data/metadata.sqlite",
+        help="Path of the metadata catalog",
+    )
     return arg_parser.parse_args()
 
 
@@ -117,7 +108,9 @@ def main():
     args = parse_args()
     random.seed(42)
 
-    fraud_edinet_codes = get_fraud_edinet_codes(args.fraud_dir)
+    fraud_edinet_codes = get_fraud_edinet_codes(
+        args.fraud_dir, MetadataCatalog(args.catalog_path)
+    )
     logging.info(f"Found {len(fraud_edinet_codes)} fraud EDINET codes.")
 
     filtered_dirs = get_nonfraud_doc_dirs(
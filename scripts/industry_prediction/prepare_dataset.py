@@ -2,11 +2,11 @@ import os
 import glob
 import random
 import polars as pl
-from concurrent.futures import ThreadPoolExecutor
 from argparse import ArgumentParser
 from tqdm import tqdm
 import json
-from edinet2dataset.parser import parse_tsv
+from edinet2dataset.cache import ParseCache
+from edinet2dataset.parser import FinancialData, parse_many
 from loguru import logger
 import datasets
 from typing import Optional
@@ -51,7 +51,9 @@ industry_mapping = {
 
 
 def process_single_company(
-    current_tsv: str, edinet_code_info: pl.DataFrame
+    current_tsv: str,
+    previous_financial_data: Optional[FinancialData],
+    edinet_code_info: pl.DataFrame,
 ) -> Optional[dict]:
     edinet_code = current_tsv.split("/")[2]
     industry = edinet_code_info.filter(pl.col("ＥＤＩＮＥＴコード") == edinet_code)[
@@ -60,13 +62,8 @@ def process_single_company(
 
     industry = industry_mapping.get(industry, "invalid")  # 16 industry label
 
-    try:
-        previous_financial_data = parse_tsv(current_tsv)
-        if not previous_financial_data:
-            logger.warning(f"Failed to parse {current_tsv}")
-            return None
-    except Exception as e:
-        logger.warning(f"Failed to parse {current_tsv}: {e}")
+    if not previous_financial_data:
+        logger.warning(f"Failed to parse {current_tsv}")
         return None
 
     return {
@@ -90,6 +87,12 @@ def parse_args():
         "--output_path", type=str, default="dataset/industry_prediction"
     )
     parser.add_argument("--num_workers", type=int, default=8)
+    parser.add_argument(
+        "--cache_path",
+        type=str,
+        default=None,
+        help="SQLite file to cache parsed reports in across runs",
+    )
     return parser.parse_args()
 
 
@@ -167,16 +170,22 @@ def main():
         sampled_tsvs.extend(sampled)
 
     # Step 3: Process in parallel
+    cache = ParseCache(args.cache_path) if args.cache_path else None
     results = []
-    with ThreadPoolExecutor(max_workers=args.num_workers) as executor:
-        futures = [
-            executor.submit(process_single_company, tsv_file, edinet_code_info)
-            for tsv_file in sampled_tsvs
-        ]
-        for future in tqdm(futures):
-            result = future.result()
-            if result:
-                results.append(result)
+    for parse_result in tqdm(
+        parse_many(sampled_tsvs, workers=args.num_workers, cache=cache),
+        total=len(sampled_tsvs),
+    ):
+        if not parse_result.ok:
+            logger.warning(
+                f"Failed to parse {parse_result.file_path}: {parse_result.error}"
+            )
+            continue
+        result = process_single_company(
+            parse_result.file_path, parse_result.data, edinet_code_info
+        )
+        if result:
+            results.append(result)
 
     # Step 4: Save dataset
     if results:
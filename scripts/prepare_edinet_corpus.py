@@ -1,8 +1,21 @@
 from argparse import ArgumentParser
+import functools
 import os
 import json
-from edinet2dataset.downloader import Downloader
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import polars as pl
+from edinet2dataset.downloader import (
+    CLOSED_DAY_MODES,
+    Downloader,
+    output_path,
+    parse_file_types,
+    select_results,
+)
+from edinet2dataset.filing_index import FilingIndex
+from edinet2dataset.listing_cache import ListingCache
+from edinet2dataset.manifest import DownloadManifest
+from edinet2dataset.schema import Response
+from concurrent.futures import ThreadPoolExecutor, wait
 from tqdm import tqdm
 from loguru import logger
 
@@ -30,58 +43,192 @@ def parse_args():
             "semiannual_amended",
         ],
     )
+    parser.add_argument(
+        "--file_type",
+        type=parse_file_types,
+        default="tsv,pdf",
+        help="Comma-separated file types to download, e.g. tsv,pdf,xbrl",
+    )
+    parser.add_argument(
+        "--csv_members",
+        type=str,
+        nargs="*",
+        default=[],
+        help="Patterns of CSV members to keep from each TSV package, "
+        "e.g. 'jpcrp*.csv' 'jpaud*.csv'",
+    )
     parser.add_argument(
         "--max_workers",
         type=int,
         default=8,
         help="Number of threads for parallel download",
     )
+    parser.add_argument(
+        "--list_concurrency",
+        type=int,
+        default=8,
+        help="Number of days whose document lists are requested at once",
+    )
+    parser.add_argument(
+        "--closed_days",
+        choices=CLOSED_DAY_MODES,
+        default="skip",
+        help="How to list weekends and holidays: skip them, probe them for "
+        "documents first, or list them in full",
+    )
+    parser.add_argument(
+        "--listing_cache_dir",
+        type=str,
+        default="data/listings",
+        help="Directory of the cached daily document listings",
+    )
+    parser.add_argument(
+        "--index_path",
+        type=str,
+        default="data/filing_index.parquet",
+        help="Path of the local filing index",
+    )
+    parser.add_argument(
+        "--manifest_path",
+        type=str,
+        default="data/download_manifest.sqlite",
+        help="Path of the download manifest",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Only retry the unfinished downloads recorded in the manifest",
+    )
     return parser.parse_args()
 
 
-def process_result(result, downloader, output_dir, doc_type) -> None:
+def needs_download(result, file_format, downloader, path, manifest) -> bool:
+    """
+    Whether a format of a filing is not on disk yet, or, for a TSV, its
+    package still has CSV members to extract.
+    """
+    file_path = output_path(path, result.docID, file_format)
+    return manifest.needs_download(result.docID, file_format, file_path) or (
+        file_format == "tsv" and downloader.members_missing(path, result.docID)
+    )
+
+
+def download_format(result, file_format, downloader, path, manifest) -> None:
+    """Download one format of a filing unless it is already on disk."""
+    file_path = output_path(path, result.docID, file_format)
+    if not needs_download(result, file_format, downloader, path, manifest):
+        if manifest.state(result.docID, file_format) != "done":
+            manifest.done(result.docID, file_format, file_path)
+        return
+
+    manifest.start(result.docID, file_format)
     try:
-        if downloader.get_doc_type(result.ordinanceCode, result.formCode) != doc_type:
-            return
+        downloader.download_document(result.docID, file_format, path)
+    except Exception as e:
+        logger.error(f"Error processing {result.docID}: {e}")
+        manifest.fail(result.docID, file_format, f"{type(e).__name__}: {e}")
+        raise
+    manifest.done(result.docID, file_format, file_path)
 
-        if result.withdrawalStatus == "1":
-            return
-        edinet_code = result.edinetCode
-        path = os.path.join(output_dir, doc_type, edinet_code)
 
-        if os.path.exists(os.path.join(path, f"{result.docID}.json")):
-            logger.info(f"Skip {edinet_code}: already exists")
+def submit_filing(result, path, formats, downloader, manifest, executors, pbar):
+    """
+    Submit one task per format of a filing: TSVs to their own executor, so
+    they never queue behind large PDFs or XBRL packages. The JSON is written
+    after the last format, and only if all of them succeeded.
+    """
+    os.makedirs(path, exist_ok=True)
+    lock = threading.Lock()
+    pending = set(formats)
+    failed = []
 
-        os.makedirs(path, exist_ok=True)
+    def on_done(file_format, future):
+        with lock:
+            pending.discard(file_format)
+            if future.exception() is not None:
+                failed.append(file_format)
+            complete = not pending and not failed
+        if complete:
+            with open(
+                os.path.join(path, f"{result.docID}.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(result.to_dict(), f, ensure_ascii=False, indent=4)
+            logger.info(f"Downloaded {result.docID} to {path}")
+        pbar.update(1)
 
-        downloader.download_document(result.docID, "tsv", path)
-        downloader.download_document(result.docID, "pdf", path)
+    futures = []
+    for file_format in formats:
+        executor = executors["tsv" if file_format == "tsv" else "file"]
+        future = executor.submit(
+            download_format, result, file_format, downloader, path, manifest
+        )
+        future.add_done_callback(functools.partial(on_done, file_format))
+        futures.append(future)
+    return futures
 
-        with open(
-            os.path.join(path, f"{result.docID}.json"), "w", encoding="utf-8"
-        ) as f:
-            json.dump(result.to_dict(), f, ensure_ascii=False, indent=4)
 
-        logger.info(f"Downloaded {result.docID} to {path}")
-    except Exception as e:
-        logger.error(f"Error processing {result.docID}: {e}")
-        return None
+def iter_missing(downloader, manifest, args):
+    """
+    Yield (result, path, formats) for every doc_type filing with a format
+    that is not downloaded yet, while the date range is still being listed.
+    Every listed filing, of any doc_type, is added to the filing index at
+    the end.
+    """
+    frames = []
+    count = 0
+    for _, json_data in downloader.iter_listings(args.start_date, args.end_date):
+        frames.append(Response.to_frame(json_data))
+        for result in select_results(
+            json_data, doc_type=args.doc_type, include_withdrawn=False
+        ):
+            count += 1
+            path = os.path.join(args.output_dir, args.doc_type, result.edinetCode)
+            formats = [
+                file_format
+                for file_format in args.file_type
+                if needs_download(result, file_format, downloader, path, manifest)
+            ]
+            if not formats:
+                continue
+            manifest.enqueue(result, path, formats)
+            yield result, path, formats
+    if frames:
+        FilingIndex(args.index_path).add(pl.concat(frames))
+    logger.info(f"Listed {count} {args.doc_type} reports")
 
 
 if __name__ == "__main__":
     args = parse_args()
-    downloader = Downloader()
-    results = downloader.get_results(args.start_date, args.end_date)
+    downloader = Downloader(
+        list_concurrency=args.list_concurrency,
+        # The TSV and file executors each run max_workers downloads
+        pool_size=2 * args.max_workers,
+        listing_cache=ListingCache(args.listing_cache_dir),
+        csv_members=args.csv_members,
+        closed_days=args.closed_days,
+    )
+    manifest = DownloadManifest(args.manifest_path)
 
-    with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
-        futures = [
-            executor.submit(
-                process_result, result, downloader, args.output_dir, args.doc_type
-            )
-            for result in results
-        ]
+    if args.resume:
+        # Pick up the queued, interrupted and failed files without listing
+        work = manifest.remaining()
+    else:
+        # Downloads start as soon as the first days are listed
+        work = iter_missing(downloader, manifest, args)
 
-        with tqdm(total=len(futures), desc="Downloading") as pbar:
-            for future in as_completed(futures):
-                result_msg = future.result()
-                pbar.update(1)
+    with (
+        ThreadPoolExecutor(max_workers=args.max_workers) as tsv_executor,
+        ThreadPoolExecutor(max_workers=args.max_workers) as file_executor,
+        tqdm(desc="Downloading") as pbar,
+    ):
+        executors = {"tsv": tsv_executor, "file": file_executor}
+        futures = []
+        for result, path, formats in work:
+            futures += submit_filing(
+                result, path, formats, downloader, manifest, executors, pbar
+            )
+        pbar.total = len(futures)
+        pbar.refresh()
+        # Failures are logged and recorded in the manifest
+        wait(futures)
+    logger.info(f"Manifest: {manifest.summary()}")
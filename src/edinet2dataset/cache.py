@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from edinet2dataset.element_catalog import ELEMENT_CATALOG
+
+# Bump whenever parse_tsv output changes for reasons other than the element
+# tables (those are covered by the per-sheet fingerprints below).
+PARSER_VERSION = "1"
+
+
+def _sheet_fingerprint(sheet_name: str) -> str:
+    entries = [
+        [e.element_id, e.label, list(e.path), e.kind]
+        for e in ELEMENT_CATALOG.elements(sheet_name)
+    ]
+    payload = json.dumps([PARSER_VERSION, sheet_name, entries], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+SHEET_FINGERPRINTS = {
+    sheet_name: _sheet_fingerprint(sheet_name)
+    for sheet_name in ELEMENT_CATALOG.sheet_names
+}
+
+
+def _sheet_key(sheet_name: str, typed: bool) -> str:
+    # Typed and raw parses of a sheet are cached side by side
+    return f"{sheet_name}:typed" if typed else sheet_name
+
+
+def file_hash(file_path) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed sheets keyed by report content.
+
+    Every sheet is stored separately under (content hash, sheet) together
+    with the fingerprint of that sheet's element table, so editing e.g. BS in
+    element_id_table.py only invalidates the cached BS sheets. Content hashes
+    are remembered per (path, size, mtime), so a hit only stats the file.
+    When the cache grows past max_bytes the least recently used entries are
+    evicted.
+
+    The SQLite connection is opened lazily per process, so the cache can be
+    passed to parse_many workers.
+    """
+
+    def __init__(self, path: str = "data/parse_cache.sqlite", max_bytes: int = 2**31):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._pid = None
+
+    def __getstate__(self):
+        return {"path": self.path, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=60)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    content_hash TEXT
+                );
+                CREATE TABLE IF NOT EXISTS sheets (
+                    content_hash TEXT,
+                    sheet TEXT,
+                    fingerprint TEXT,
+                    value BLOB,
+                    size INTEGER,
+                    last_access REAL,
+                    PRIMARY KEY (content_hash, sheet)
+                );
+                CREATE INDEX IF NOT EXISTS sheets_last_access
+                    ON sheets (last_access);
+                """
+            )
+        return self._conn
+
+    def content_hash(self, file_path) -> str:
+        stat = os.stat(file_path)
+        path = os.path.abspath(file_path)
+        row = self.conn.execute(
+            "SELECT content_hash FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        if row:
+            return row[0]
+        content_hash = file_hash(file_path)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, content_hash),
+            )
+        return content_hash
+
+    def get(
+        self, file_path, sheet_names: list[str], typed: bool = False
+    ) -> dict[str, dict]:
+        """Return the cached sheets of a report that are still valid."""
+        content_hash = self.content_hash(file_path)
+        keys = {_sheet_key(sheet, typed): sheet for sheet in sheet_names}
+        placeholders = ",".join("?" * len(keys))
+        rows = self.conn.execute(
+            f"SELECT sheet, fingerprint, value FROM sheets "
+            f"WHERE content_hash = ? AND sheet IN ({placeholders})",
+            (content_hash, *keys),
+        ).fetchall()
+        sheets = {
+            keys[key]: json.loads(zlib.decompress(value))
+            for key, fingerprint, value in rows
+            if fingerprint == SHEET_FINGERPRINTS[keys[key]]
+        }
+        if sheets:
+            placeholders = ",".join("?" * len(sheets))
+            with self.conn:
+                self.conn.execute(
+                    f"UPDATE sheets SET last_access = ? "
+                    f"WHERE content_hash = ? AND sheet IN ({placeholders})",
+                    (
+                        time.time(),
+                        content_hash,
+                        *(_sheet_key(sheet, typed) for sheet in sheets),
+                    ),
+                )
+        return sheets
+
+    def put(self, file_path, sheets: dict[str, dict], typed: bool = False) -> None:
+        content_hash = self.content_hash(file_path)
+        now = time.time()
+        rows = []
+        for sheet, data in sheets.items():
+            value = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+            rows.append(
+                (
+                    content_hash,
+                    _sheet_key(sheet, typed),
+                    SHEET_FINGERPRINTS[sheet],
+                    value,
+                    len(value),
+                    now,
+                )
+            )
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sheets VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used sheets until the cache fits in max_bytes."""
+        (total,) = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM sheets"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        with self.conn:
+            for content_hash, sheet, size in self.conn.execute(
+                "SELECT content_hash, sheet, size FROM sheets ORDER BY last_access"
+            ).fetchall():
+                if excess <= 0:
+                    break
+                self.conn.execute(
+                    "DELETE FROM sheets WHERE content_hash = ? AND sheet = ?",
+                    (content_hash, sheet),
+                )
+                excess -= size
+
+
+def test_parse_cache(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache.sqlite"), max_bytes=10_000)
+    file_path = "data/E00304/S100ISXG.tsv"
+    assert cache.get(file_path, ["META", "BS"]) == {}
+
+    cache.put(
+        file_path, {"META": {"会社名": "x"}, "BS": {"資産": {"CurrentYear": "1"}}}
+    )
+    assert cache.get(file_path, ["META", "BS", "PL"]) == {
+        "META": {"会社名": "x"},
+        "BS": {"資産": {"CurrentYear": "1"}},
+    }
+
+    # A stale fingerprint only invalidates that sheet
+    with cache.conn:
+        cache.conn.execute("UPDATE sheets SET fingerprint = 'old' WHERE sheet = 'BS'")
+    assert list(cache.get(file_path, ["META", "BS"])) == ["META"]
+
+    assert cache.get(file_path, ["META"], typed=True) == {}
+    cache.put(file_path, {"META": {"会社名": "y"}}, typed=True)
+    assert cache.get(file_path, ["META"], typed=True) == {"META": {"会社名": "y"}}
+    assert cache.get(file_path, ["META"]) == {"META": {"会社名": "x"}}
+
+    cache.max_bytes = 0
+    cache.evict()
+    assert cache.get(file_path, ["META", "BS"]) == {}
@@ -0,0 +1,179 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+import polars as pl
+
+# Columns of EdinetcodeDlInfo.csv searched by name
+NAME_COLUMNS = ["提出者名", "提出者名（ヨミ）", "提出者名（英字）"]
+LEGAL_FORMS = re.compile(
+    r"株式会社|有限会社|合同会社|合資会社|合名会社|"
+    r"カブシキガイシャ|カブシキカイシャ|ユウゲンガイシャ|ゴウドウガイシャ|"
+    r"\b(?:corporation|corp|company|co|ltd|limited|inc|incorporated|holdings?)\b"
+)
+IGNORED_CHARACTERS = re.compile(r"[\s・,.'\"()\-&]")
+
+
+def normalize(text: str) -> str:
+    """NFKC-normalize, casefold and drop spaces and punctuation."""
+    return IGNORED_CHARACTERS.sub("", unicodedata.normalize("NFKC", text).casefold())
+
+
+def core_name(text: str) -> str:
+    """normalize() without legal forms such as 株式会社 or Co., Ltd."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return normalize(LEGAL_FORMS.sub(" ", text.replace(".", " ")))
+
+
+def bigrams(key: str) -> set[str]:
+    return {key[i : i + 2] for i in range(len(key) - 1)} or {key}
+
+
+class CompanyIndex:
+    """
+    Search index over the EDINET code table (EdinetcodeDlInfo.csv).
+
+    Names, readings and English names are NFKC-normalized, casefolded and
+    stripped of spaces and punctuation, so 株式会社　オーテック, 株式会社オーテック
+    and ｶﾌﾞｼｷｶﾞｲｼｬ ｵｰﾃｯｸ all match. lookup() resolves an exact name, EDINET
+    code or securities code through a dictionary; search() ranks fuzzy
+    matches using a bigram inverted index.
+    """
+
+    def __init__(self, edinet_code_info: pl.DataFrame):
+        self.frame = edinet_code_info
+        self.codes = edinet_code_info["ＥＤＩＮＥＴコード"].to_list()
+        self._raw = defaultdict(set)  # names exactly as listed
+        self._exact = defaultdict(set)
+        self._keys = []  # (row, key) of every searchable name
+        self._postings = defaultdict(list)
+
+        for row, code in enumerate(self.codes):
+            self._exact[code.casefold()].add(row)
+        # 5-digit securities codes end with a check digit 0; 4 digits are common
+        sec_codes = edinet_code_info["証券コード"].cast(pl.String).to_list()
+        for row, sec_code in enumerate(sec_codes):
+            if sec_code:
+                self._exact[sec_code].add(row)
+                self._exact[sec_code[:4]].add(row)
+        for column in NAME_COLUMNS:
+            for row, name in enumerate(edinet_code_info[column].to_list()):
+                if not name:
+                    continue
+                self._raw[name].add(row)
+                for key in {normalize(name), core_name(name)}:
+                    if not key:
+                        continue
+                    self._exact[key].add(row)
+                    entry = len(self._keys)
+                    self._keys.append((row, key))
+                    for gram in bigrams(key):
+                        self._postings[gram].append(entry)
+
+    def lookup(self, query: str) -> str | None:
+        """Return the EDINET code of an exact name or code, if unambiguous."""
+        # Some distinct companies only differ in spacing or punctuation, e.g.
+        # 株式会社協和 and 株式会社　協和, so the name as listed comes first
+        rows = self._raw.get(query, set())
+        if len(rows) == 1:
+            return self.codes[next(iter(rows))]
+        rows = self._exact.get(normalize(query), set())
+        if not rows:
+            rows = self._exact.get(core_name(query), set())
+        if len(rows) != 1:
+            return None
+        return self.codes[next(iter(rows))]
+
+    def resolve(self, queries: list[str]) -> dict[str, str | None]:
+        """lookup() every query."""
+        return {query: self.lookup(query) for query in queries}
+
+    def scores(self, query: str) -> dict[int, float]:
+        """Best match score in [0, 2] of every row sharing a bigram with query."""
+        key = normalize(query)
+        if not key:
+            return {}
+        grams = bigrams(key)
+        shared = Counter(
+            entry for gram in grams for entry in self._postings.get(gram, ())
+        )
+        scores = {}
+        for entry, count in shared.items():
+            row, candidate = self._keys[entry]
+            # Dice coefficient of the bigram sets, plus a bonus for containment
+            score = 2 * count / (len(grams) + len(bigrams(candidate)))
+            if candidate == key:
+                score += 1
+            elif key in candidate:
+                score += 0.5
+            scores[row] = max(scores.get(row, 0), score)
+        return scores
+
+    def search(
+        self, query: str, limit: int = 20, min_score: float = 0.3
+    ) -> pl.DataFrame:
+        """Return the best matching companies, highest score first."""
+        rows = self._exact.get(normalize(query), set())
+        scores = self.scores(query)
+        for row in rows:
+            scores[row] = max(scores.get(row, 0), 2)
+        ranked = sorted(
+            (item for item in scores.items() if item[1] >= min_score),
+            key=lambda item: (-item[1], item[0]),
+        )[:limit]
+        return self.frame[[row for row, _ in ranked]].with_columns(
+            pl.Series("score", [round(score, 3) for _, score in ranked])
+        )
+
+
+def test_company_index():
+    df = pl.DataFrame(
+        {
+            "ＥＤＩＮＥＴコード": [
+                "E00304",
+                "E02144",
+                "E00540",
+                "E01863",
+                "E90001",
+                "E90002",
+            ],
+            "提出者名": [
+                "株式会社　オーテック",
+                "トヨタ自動車株式会社",
+                "トヨタ紡織株式会社",
+                "船井電機株式会社",
+                "株式会社協和",
+                "株式会社　協和",
+            ],
+            "提出者名（ヨミ）": [
+                "カブシキガイシャ　オーテック",
+                "トヨタジドウシャカブシキガイシャ",
+                "トヨタボウショクカブシキガイシャ",
+                "フナイデンキカブシキガイシャ",
+                "カブシキガイシャキョウワ",
+                "カブシキガイシャ　キョウワ",
+            ],
+            "提出者名（英字）": [
+                "OTEC CORPORATION",
+                "TOYOTA MOTOR CORPORATION",
+                "TOYOTA BOSHOKU CORPORATION",
+                "FUNAI ELECTRIC CO., LTD.",
+                None,
+                None,
+            ],
+            "証券コード": ["17360", "72030", "31160", None, None, None],
+        }
+    )
+    index = CompanyIndex(df)
+    assert index.lookup("株式会社オーテック") == "E00304"
+    assert index.lookup("ｵｰﾃｯｸ") == "E00304"
+    assert index.lookup("Funai Electric Co., Ltd.") == "E01863"
+    assert index.lookup("7203") == "E02144"
+    assert index.lookup("e02144") == "E02144"
+    assert index.lookup("トヨタ") is None
+    assert index.lookup("株式会社協和") == "E90001"
+    assert index.lookup("株式会社　協和") == "E90002"
+    assert index.lookup("協和") is None
+    assert set(index.search("トヨタ")["ＥＤＩＮＥＴコード"]) == {"E02144", "E00540"}
+    assert index.search("トヨタ自動車")["ＥＤＩＮＥＴコード"][0] == "E02144"
+    assert index.search("toyota motor")["ＥＤＩＮＥＴコード"][0] == "E02144"
@@ -1,28 +1,127 @@
-import requests
+import argparse
+import collections
+import contextlib
 import datetime
-import shutil
+import fnmatch
+import functools
+import io
+import itertools
+import json
 import os
-from tqdm import tqdm
-
-from edinet2dataset.schema import Response, Result
-import argparse
+import re
+import shutil
 import tempfile
+import threading
 import zipfile
-import io
+from collections.abc import Collection, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import fields
+
 import polars as pl
+import requests
 from loguru import logger
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
+from urllib3.util.retry import Retry
+
+from edinet2dataset.company_index import CompanyIndex
+from edinet2dataset.jp_calendar import is_business_day
+from edinet2dataset.listing_cache import ListingCache
+from edinet2dataset.reader import convert_to_parquet
+from edinet2dataset.scheduler import RequestScheduler
+from edinet2dataset.schema import Response, Result, get_doc_type
 
 pl.Config.set_tbl_cols(-1)
 
 
-def download_edinetinfo_csv(dir: str = "data"):
+# Written next to the CSV members extracted from a type=5 package
+MEMBER_MANIFEST = "members.json"
+
+# How weekends and holidays are listed: "skip" requests nothing for them,
+# "probe" sends a metadata-only request first and "list" lists them in full
+CLOSED_DAY_MODES = ("skip", "probe", "list")
+
+# Downloaded zips up to this size stay in memory, larger ones go to disk
+SPOOL_MAX_SIZE = 32 * 2**20
+
+
+def spool_response(res: requests.Response) -> tempfile.SpooledTemporaryFile:
+    """Copy a streamed response body into a seekable spooled file."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    for chunk in res.iter_content(chunk_size=1 << 20):
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+def write_atomic(source, output_file: str) -> None:
+    """
+    Copy a binary file object to output_file through a temporary file in the
+    same directory, so the file appears complete or not at all.
+    """
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    tmp_path = f"{output_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(source, f, 1 << 20)
+        os.replace(tmp_path, output_file)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def test_write_atomic(tmp_path):
+    with zipfile.ZipFile(tmp_path / "doc.zip", "w") as z:
+        z.writestr("XBRL_TO_CSV/jpcrp.csv", b"a" * 100_000)
+    with open(tmp_path / "doc.zip", "rb") as spool, zipfile.ZipFile(spool) as z:
+        with z.open("XBRL_TO_CSV/jpcrp.csv") as f:
+            write_atomic(f, str(tmp_path / "out" / "doc.tsv"))
+    assert (tmp_path / "out" / "doc.tsv").read_bytes() == b"a" * 100_000
+    assert os.listdir(tmp_path / "out") == ["doc.tsv"]
+
+
+def make_session(pool_size: int = 16, max_retries: int = 3) -> requests.Session:
+    """
+    Create a session whose connections are kept alive and shared by threads.
+
+    Connection errors and 429/5xx responses to GET requests are retried up to
+    max_retries times with exponential backoff.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def test_make_session():
+    session = make_session(pool_size=4, max_retries=2)
+    adapter = session.get_adapter("https://disclosure.edinet-fsa.go.jp")
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 2
+    assert 503 in adapter.max_retries.status_forcelist
+
+
+def download_edinetinfo_csv(
+    dir: str = "data", session: requests.Session | None = None, timeout=None
+):
     url = (
         "https://disclosure2dl.edinet-fsa.go.jp/searchdocument/codelist/Edinetcode.zip"
     )
     if os.path.exists(os.path.join(dir, "EdinetcodeDlInfo.zip")):
         logger.error("File already exists. Skipping download.")
         return
-    with requests.get(url) as res:
+    session = session or requests.Session()
+    with session.get(url, timeout=timeout) as res:
         with open(os.path.join(dir, "EdinetcodeDlInfo.zip"), "wb") as file:
             file.write(res.content)
             logger.info("Downloaded EdinetcodeDlInfo.zip")
@@ -33,9 +132,176 @@ def download_edinetinfo_csv(dir: str = "data"):
         existing_zip.extractall(dir)
 
 
-def search_company(edinet_code_info: pl.DataFrame, query: str) -> pl.DataFrame | None:
-    """Search for a company by name and return its EDINET code."""
-    result = edinet_code_info.filter(pl.col("提出者名").str.contains(query))
+# Downloadable formats, in the order they are prioritized
+FILE_TYPES = ("tsv", "pdf", "xbrl")
+
+
+def parse_file_types(value: str) -> list[str]:
+    """Parse a comma-separated set of file types such as "tsv,pdf"."""
+    file_types = {file_type.strip() for file_type in value.split(",") if file_type}
+    unknown = file_types - set(FILE_TYPES)
+    if unknown or not file_types:
+        raise argparse.ArgumentTypeError(
+            f"file types must be a comma-separated subset of {','.join(FILE_TYPES)}"
+        )
+    return [file_type for file_type in FILE_TYPES if file_type in file_types]
+
+
+def output_path(output_dir: str, doc_id: str, file_type: str) -> str:
+    """Where download_document writes a format: a directory for XBRL."""
+    if file_type == "xbrl":
+        return os.path.join(output_dir, doc_id)
+    return os.path.join(output_dir, f"{doc_id}.{file_type}")
+
+
+def csv_dir(output_dir: str, doc_id: str) -> str:
+    """
+    Directory of the CSV members extracted from a document's package, apart
+    from the XBRL directory output_dir/doc_id.
+    """
+    return os.path.join(output_dir, f"{doc_id}_csv")
+
+
+def is_downloaded(output_dir: str, doc_id: str, file_type: str) -> bool:
+    """Whether a format of a document is already on disk and not empty."""
+    path = output_path(output_dir, doc_id, file_type)
+    if file_type == "xbrl":
+        return os.path.isdir(path) and any(os.scandir(path))
+    return os.path.isfile(path) and os.path.getsize(path) > 0
+
+
+def test_file_types(tmp_path):
+    assert parse_file_types("pdf, tsv") == ["tsv", "pdf"]
+    try:
+        parse_file_types("tsv,docx")
+    except argparse.ArgumentTypeError:
+        pass
+    else:
+        raise AssertionError("expected ArgumentTypeError")
+
+    assert not is_downloaded(str(tmp_path), "S100TEST", "tsv")
+    (tmp_path / "S100TEST.tsv").write_text("a")
+    assert is_downloaded(str(tmp_path), "S100TEST", "tsv")
+    (tmp_path / "S100TEST").mkdir()
+    assert not is_downloaded(str(tmp_path), "S100TEST", "xbrl")
+    (tmp_path / "S100TEST" / "manifest.xml").write_text("a")
+    assert is_downloaded(str(tmp_path), "S100TEST", "xbrl")
+
+
+EDINET_CODE_CSV = "data/EdinetcodeDlInfo.csv"
+# Reentrant, since building the company index loads the table
+_edinet_code_lock = threading.RLock()
+
+
+def _read_edinet_code_csv(csv_path: str) -> pl.DataFrame:
+    # df contains the following columns:
+    # ＥＤＩＮＥＴコード,提出者種別,上場区分,連結の有無,資本金,決算日,提出者名,提出者名（英字）,提出者名（ヨミ）,所在地,提出者業種,証券コード,提出者法人番号
+    with open(csv_path, "r", encoding="shift_jis", errors="replace") as f:
+        content = f.read()
+
+    return pl.read_csv(
+        content.encode("utf-8"),
+        encoding="utf8",
+        skip_rows=1,  # skip the first row
+    )
+
+
+@functools.cache
+def _load_edinet_code_info(csv_path: str) -> pl.DataFrame:
+    cache_path = os.path.splitext(csv_path)[0] + ".parquet"
+    csv_exists = os.path.exists(csv_path)
+    if os.path.exists(cache_path) and (
+        not csv_exists or os.path.getmtime(cache_path) >= os.path.getmtime(csv_path)
+    ):
+        return pl.read_parquet(cache_path)
+    if not csv_exists:
+        download_edinetinfo_csv(os.path.dirname(csv_path) or ".", timeout=(10, 120))
+    df = _read_edinet_code_csv(csv_path)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    df.write_parquet(tmp_path)
+    os.replace(tmp_path, cache_path)
+    return df
+
+
+def load_edinet_code_info(csv_path: str = EDINET_CODE_CSV) -> pl.DataFrame:
+    """
+    Return the EDINET code table, loaded once per process.
+
+    The Shift-JIS CSV is converted once into a typed Parquet file next to it,
+    which is read instead until the CSV changes. The CSV is downloaded if
+    neither exists.
+    """
+    with _edinet_code_lock:
+        return _load_edinet_code_info(csv_path)
+
+
+@functools.cache
+def _load_company_index(csv_path: str) -> CompanyIndex:
+    return CompanyIndex(load_edinet_code_info(csv_path))
+
+
+def load_company_index(csv_path: str = EDINET_CODE_CSV) -> CompanyIndex:
+    """Return the CompanyIndex of the EDINET code table, built once per process."""
+    with _edinet_code_lock:
+        return _load_company_index(csv_path)
+
+
+def test_load_edinet_code_info(tmp_path):
+    csv_path = tmp_path / "EdinetcodeDlInfo.csv"
+    csv_path.write_bytes(
+        "ダウンロード実行日,2025年01月01日現在,件数,1件\n"
+        "ＥＤＩＮＥＴコード,資本金,提出者名,提出者名（英字）,提出者名（ヨミ）,証券コード\n"
+        "E00304,100,株式会社　オーテック,OTEC CORPORATION,オーテック,17360\n".encode(
+            "shift_jis"
+        )
+    )
+    df = load_edinet_code_info(str(csv_path))
+    assert df["提出者名"].to_list() == ["株式会社　オーテック"]
+    assert df.schema["資本金"] == pl.Int64
+    assert load_edinet_code_info(str(csv_path)) is df
+
+    # Other processes read the Parquet cache without the CSV
+    csv_path.unlink()
+    _load_edinet_code_info.cache_clear()
+    assert load_edinet_code_info(str(csv_path)).equals(df)
+    assert load_company_index(str(csv_path)).lookup("オーテック") == "E00304"
+
+
+def select_results(
+    json_data: dict,
+    edinet_code: str | Collection[str] | None = None,
+    doc_type: str | Collection[str] | None = None,
+    include_withdrawn: bool = True,
+) -> Iterator[Result]:
+    """
+    Yield the documents of a listing that match the filters. edinet_code
+    and doc_type may be a single value or a collection. The filters are
+    applied to the raw listing rows, so Result objects are only built for
+    matching documents.
+    """
+    edinet_codes = {edinet_code} if isinstance(edinet_code, str) else edinet_code
+    doc_types = {doc_type} if isinstance(doc_type, str) else doc_type
+    if edinet_codes is not None:
+        edinet_codes = set(edinet_codes)
+    if doc_types is not None:
+        doc_types = set(doc_types)
+
+    for row in json_data.get("results") or []:
+        if edinet_codes is not None and row["edinetCode"] not in edinet_codes:
+            continue
+        if not include_withdrawn and row["withdrawalStatus"] == "1":
+            continue
+        if (
+            doc_types is not None
+            and get_doc_type(row["ordinanceCode"], row["formCode"]) not in doc_types
+        ):
+            continue
+        yield Result.from_json(row)
+
+
+def search_company(company_index: CompanyIndex, query: str) -> pl.DataFrame | None:
+    """Search for a company by name and return its EDINET code, best match first."""
+    result = company_index.search(query)
     if result.is_empty():
         return None
     return result.select(
@@ -43,35 +309,51 @@ def search_company(edinet_code_info: pl.DataFrame, query: str) -> pl.DataFrame |
             "提出者名",
             "ＥＤＩＮＥＴコード",
             "提出者業種",
+            "score",
         ]
     )
 
 
 class Downloader:
-    def __init__(self):
+    def __init__(
+        self,
+        list_concurrency: int = 8,
+        pool_size: int = 16,
+        timeout: float | tuple[float, float] = (10, 120),
+        max_retries: int = 3,
+        listing_cache: ListingCache | None = None,
+        max_rate: float = 10.0,
+        closed_days: str = "skip",
+        csv_members: Sequence[str] = (),
+    ):
         self.base_url = "https://disclosure.edinet-fsa.go.jp/api/v2/documents.json"
-        self.edinet_code_info = self._load_edinet_code_info()
+        # Number of days whose document lists are requested at once
+        self.list_concurrency = list_concurrency
+        # (connect, read) timeout in seconds for every request
+        self.timeout = timeout
+        pool_size = max(pool_size, list_concurrency)
+        # One keep-alive connection pool for all requests, shared by threads.
+        # Retries are left to the scheduler, which also throttles on errors.
+        self.session = make_session(pool_size, max_retries=0)
+        self.scheduler = RequestScheduler(
+            max_rate=max_rate, max_concurrency=pool_size, max_retries=max_retries
+        )
+        # Daily listings are served from disk once they have settled
+        self.listing_cache = listing_cache or ListingCache()
+        # How weekends and holidays are listed, one of CLOSED_DAY_MODES
+        if closed_days not in CLOSED_DAY_MODES:
+            raise ValueError(f"Unknown closed_days mode: {closed_days}")
+        self.closed_days = closed_days
+        # Patterns such as "jpaud*.csv" of the CSV members kept from every
+        # type=5 package, besides the jpcrp TSV
+        self.csv_members = tuple(csv_members)
         assert os.environ.get("EDINET_API_KEY") is not None, "EDINET_API_KEY is not set"
         self.edinet_api_key = os.environ.get("EDINET_API_KEY")
 
-    @staticmethod
-    def _load_edinet_code_info() -> pl.DataFrame:
-        # df contains the following columns:
-        # ＥＤＩＮＥＴコード,提出者種別,上場区分,連結の有無,資本金,決算日,提出者名,提出者名（英字）,提出者名（ヨミ）,所在地,提出者業種,証券コード,提出者法人番号
-
-        file_path = "data/EdinetcodeDlInfo.csv"
-        if not os.path.exists(file_path):
-            download_edinetinfo_csv()
-
-        with open(file_path, "r", encoding="shift_jis", errors="replace") as f:
-            content = f.read()
-
-        df = pl.read_csv(
-            content.encode("utf-8"),
-            encoding="utf8",
-            skip_rows=1,  # skip the first row
-        )
-        return df
+    @property
+    def edinet_code_info(self) -> pl.DataFrame:
+        """EDINET code table, loaded on first use and shared by the process."""
+        return load_edinet_code_info()
 
     @staticmethod
     def make_day_list(
@@ -86,65 +368,218 @@ class Downloader:
         day_list.append(end_date)
         return day_list
 
-    @staticmethod
-    def get_response(url: str, date: datetime.date, type: int, key: str) -> dict:
+    def get_response(self, url: str, date: datetime.date, type: int, key: str) -> dict:
         # type: 1:metadata only, 2:metadata and results
         params = {"date": date, "type": type, "Subscription-Key": key}
-        res = requests.get(url, params=params)
+        res = self.scheduler.request(
+            self.session.get, url, params=params, timeout=self.timeout
+        )
         return res.json()
 
+    def fetch_listing(self, date: datetime.date) -> dict:
+        """
+        Request the documents.json listing of a date. With closed_days
+        "probe", a day on which the market is closed gets a metadata-only
+        (type=1) request first, and the full listing is only requested if
+        it counts any documents.
+        """
+        if self.closed_days == "probe" and not is_business_day(date):
+            probe = self.get_response(self.base_url, date, 1, self.edinet_api_key)
+            if probe.get("metadata", {}).get("resultset", {}).get("count") == 0:
+                return {**probe, "results": []}
+        return self.get_response(self.base_url, date, 2, self.edinet_api_key)
+
+    def get_listing(self, date: datetime.date) -> dict:
+        """Return the documents.json listing of a date, using the listing cache."""
+        if self.closed_days == "skip" and not is_business_day(date):
+            # Not cached, so a later run in another mode still lists the day
+            return {"results": []}
+        return self.listing_cache.get_or_fetch(date, lambda: self.fetch_listing(date))
+
+    @property
+    def company_index(self) -> CompanyIndex:
+        return load_company_index()
+
     def get_edinet_code(self, company_name: str) -> str:
-        edinet_code = (
-            self.edinet_code_info.filter(pl.col("提出者名") == company_name)
-            .select(["ＥＤＩＮＥＴコード"])
-            .to_numpy()
-            .item(0)
-        )
+        """
+        Return the EDINET code of a company name, reading, English name or
+        securities code. Spacing, width and legal forms such as 株式会社 are
+        ignored; an unknown or ambiguous name raises IndexError.
+        """
+        edinet_code = self.company_index.lookup(company_name)
+        if edinet_code is None:
+            raise IndexError(f"Company not found: {company_name}")
         return edinet_code
 
     @staticmethod
     def get_doc_type(ordinanceCode: str, formCode: str) -> str:
-        match (ordinanceCode, formCode):
-            case ("010", "030000"):
-                return "annual"
-            case ("010", "030001"):
-                return "annual_amended"
-            case ("010", "043000"):
-                return "quarterly"
-            case ("010", "043001"):
-                return "quarterly_amended"
-            case ("010", "043A00"):
-                return "semiannual"
-            case ("010", "043A01"):
-                return "semiannual_amended"
-            case _:
-                return "unknown"
+        return get_doc_type(ordinanceCode, formCode)
 
-    def get_results(self, start_date, end_date, edinet_code=None) -> list[Result]:
+    def iter_listings(
+        self, start_date: str, end_date: str
+    ) -> Iterator[tuple[datetime.date, dict]]:
+        """
+        Yield (date, listing) for every day between start_date and end_date,
+        in order. Up to list_concurrency days are fetched ahead of the
+        consumer, so only that many listings are held in memory at once.
+        """
         day_list = self.make_day_list(
             datetime.datetime.strptime(start_date, "%Y-%m-%d").date(),
             datetime.datetime.strptime(end_date, "%Y-%m-%d").date(),
         )
-        result_list = []
-        for day in tqdm(
-            day_list, desc=f"Downloading documents ({start_date} - {end_date})"
-        ):
-            json_data = self.get_response(
-                self.base_url,
-                day,
-                2,
-                self.edinet_api_key,
+        days = iter(day_list)
+        executor = ThreadPoolExecutor(max_workers=self.list_concurrency)
+        window = collections.deque(
+            (day, executor.submit(self.get_listing, day))
+            for day in itertools.islice(days, self.list_concurrency)
+        )
+        try:
+            with tqdm(
+                total=len(day_list),
+                desc=f"Downloading documents ({start_date} - {end_date})",
+            ) as pbar:
+                while window:
+                    day, future = window.popleft()
+                    for next_day in itertools.islice(days, 1):
+                        window.append(
+                            (next_day, executor.submit(self.get_listing, next_day))
+                        )
+                    listing = future.result()
+                    pbar.update(1)
+                    yield day, listing
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def iter_results(
+        self,
+        start_date: str,
+        end_date: str,
+        edinet_code: str | Collection[str] | None = None,
+        doc_type: str | Collection[str] | None = None,
+        include_withdrawn: bool = True,
+    ) -> Iterator[Result]:
+        """
+        Yield the documents submitted between start_date and end_date, day
+        by day, while later days are still being listed.
+
+        edinet_code and doc_type may be a single value or a collection; see
+        select_results.
+        """
+        for _, json_data in self.iter_listings(start_date, end_date):
+            yield from select_results(
+                json_data, edinet_code, doc_type, include_withdrawn
             )
-            if not json_data.get("results"):
-                continue
-            response = Response(json_data)
-            result_list.extend(response.results)
-        # filter by edinet code
-        if edinet_code is not None:
-            result_list = [
-                result for result in result_list if result.edinetCode == edinet_code
-            ]
-        return result_list
+
+    def iter_result_frames(
+        self, start_date: str, end_date: str
+    ) -> Iterator[pl.DataFrame]:
+        """Yield the listing of each day as a frame with a doc_type column."""
+        for _, json_data in self.iter_listings(start_date, end_date):
+            yield Response.to_frame(json_data)
+
+    def get_results(self, start_date, end_date, edinet_code=None) -> list[Result]:
+        return list(self.iter_results(start_date, end_date, edinet_code))
+
+    def resolve_companies(self, companies: list[str]) -> list[str]:
+        """
+        Map company names or EDINET codes to EDINET codes, skipping (with a
+        warning) names that are not found.
+        """
+        resolved = self.company_index.resolve(
+            [company for company in companies if not re.fullmatch(r"E\d{5}", company)]
+        )
+        edinet_codes = []
+        for company in companies:
+            edinet_code = resolved.get(company, company)
+            if edinet_code is None:
+                logger.warning(f"Company not found: {company}")
+            else:
+                edinet_codes.append(edinet_code)
+        return edinet_codes
+
+    def download_companies(
+        self,
+        edinet_codes: list[str],
+        start_date: str,
+        end_date: str,
+        doc_type: str = "annual",
+        file_type: str | Collection[str] = "tsv",
+        output_dir: str = "data",
+        max_workers: int = 8,
+    ) -> list[str]:
+        """
+        Download every doc_type document of several companies.
+
+        The date range is listed once for all companies and the matching
+        documents are downloaded concurrently into output_dir/<EDINET code>
+        as soon as the day they were submitted has been listed. file_type
+        may be a set of formats; TSVs are fetched by their own workers, so
+        they never wait behind large PDF or XBRL packages, and formats
+        already on disk are skipped. Returns the IDs of the documents whose
+        formats are all on disk.
+        """
+        file_types = [file_type] if isinstance(file_type, str) else list(file_type)
+
+        def download(result: Result, file_type: str) -> None:
+            path = os.path.join(output_dir, result.edinetCode)
+            os.makedirs(path, exist_ok=True)
+            self.download_missing(result.docID, file_type, path)
+
+        futures = {}
+        with (
+            ThreadPoolExecutor(max_workers=max_workers) as tsv_executor,
+            ThreadPoolExecutor(max_workers=max_workers) as file_executor,
+        ):
+            for result in self.iter_results(
+                start_date,
+                end_date,
+                edinet_codes,
+                doc_type=doc_type,
+                include_withdrawn=False,
+            ):
+                for file_type in file_types:
+                    executor = tsv_executor if file_type == "tsv" else file_executor
+                    futures[executor.submit(download, result, file_type)] = result
+            logger.info(f"Found {len(futures)} {doc_type} files")
+            failed = set()
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.add(futures[future].docID)
+                    logger.error(f"Failed to download {futures[future].docID}: {e}")
+        doc_ids = dict.fromkeys(result.docID for result in futures.values())
+        return [doc_id for doc_id in doc_ids if doc_id not in failed]
+
+    def download_missing(self, doc_id: str, file_type: str, output_dir: str) -> bool:
+        """
+        Download a format of a document unless it is already in output_dir.
+        Returns whether it was downloaded.
+        """
+        if is_downloaded(output_dir, doc_id, file_type) and not (
+            file_type == "tsv" and self.members_missing(output_dir, doc_id)
+        ):
+            logger.info(f"Skip {doc_id}.{file_type}: already exists")
+            return False
+        self.download_document(doc_id, file_type, output_dir)
+        return True
+
+    def members_missing(self, output_dir: str, doc_id: str) -> bool:
+        """
+        Whether csv_members are requested but the members of a document's
+        TSV package were not extracted with the same patterns.
+        """
+        if not self.csv_members:
+            return False
+        try:
+            with open(
+                os.path.join(csv_dir(output_dir, doc_id), MEMBER_MANIFEST),
+                encoding="utf-8",
+            ) as f:
+                patterns = json.load(f)["patterns"]
+        except (OSError, ValueError, KeyError):
+            return True
+        return patterns != list(self.csv_members)
 
     def download_document(self, doc_id, file_type="tsv", output_dir="data") -> None:
         match file_type:
@@ -157,62 +592,283 @@ class Downloader:
             case _:
                 raise ValueError(f"Unknown file type: {file_type}")
 
+    @contextlib.contextmanager
+    def _get_document(self, doc_id: str, type: int) -> Iterator[requests.Response]:
+        """
+        Request a document as a stream. type: 1 for XBRL, 2 for PDF, 5 for CSV
+
+        The request keeps its scheduler slot until the body has been read.
+        """
+        url = "https://disclosure.edinet-fsa.go.jp/api/v2/documents/" + doc_id
+        params = {"type": type, "Subscription-Key": self.edinet_api_key}
+        with self.scheduler.stream(
+            self.session.get, url, params=params, timeout=self.timeout
+        ) as res:
+            # Errors such as an unknown docID come back as 200 with a JSON body
+            if res.headers.get("Content-Type", "").startswith("application/json"):
+                raise requests.HTTPError(f"{doc_id}: {res.json()}", response=res)
+            # Let res.raw undo any gzip transfer encoding while it is copied
+            res.raw.decode_content = True
+            yield res
+
     def _download_document_in_pdf(self, doc_id: str, output_dir: str = "data") -> None:
         """Retrieve a specific document from EDINET API. type: 2 for PDF"""
-        url = "https://disclosure.edinet-fsa.go.jp/api/v2/documents/" + doc_id
-        params = {"type": 2, "Subscription-Key": self.edinet_api_key}
-        with requests.get(url, params=params) as res:
-            with open(os.path.join(output_dir, f"{doc_id}.pdf"), "wb") as f:
-                f.write(res.content)
+        with self._get_document(doc_id, 2) as res:
+            write_atomic(res.raw, os.path.join(output_dir, f"{doc_id}.pdf"))
         logger.info(f"Downloaded {doc_id}.pdf to {output_dir}")
 
     def _download_document_in_xbrl(self, doc_id: str, output_dir: str = "data") -> None:
         """Retrieve a specific document from EDINET API. type: 1 for XBRL"""
-        url = "https://disclosure.edinet-fsa.go.jp/api/v2/documents/" + doc_id
-        params = {"type": 1, "Subscription-Key": self.edinet_api_key}
         # zip download
+        document_dir = os.path.normpath(os.path.join(output_dir, doc_id))
+        # Extracted next to the document directory and moved into place at
+        # the end, so an interrupted download never leaves a partial package
+        tmp_dir = f"{document_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        old_dir = f"{tmp_dir}.old"
         try:
-            with requests.get(url, params=params) as res:
-                with tempfile.TemporaryDirectory() as tmp_dir:
-                    with zipfile.ZipFile(io.BytesIO(res.content)) as z:
-                        for file in z.namelist():
-                            z.extract(file, tmp_dir)
-                            output_file = os.path.join(output_dir, f"{doc_id}", file)
-                            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-                            shutil.move(
-                                os.path.join(tmp_dir, file),
-                                output_file,
-                            )
+            with self._get_document(doc_id, 1) as res, spool_response(res) as spool:
+                with zipfile.ZipFile(spool) as z:
+                    os.makedirs(tmp_dir)
+                    for member in z.infolist():
+                        output_file = os.path.normpath(
+                            os.path.join(tmp_dir, member.filename)
+                        )
+                        # Skip directories and members that would escape
+                        if member.is_dir() or not output_file.startswith(
+                            os.path.join(tmp_dir, "")
+                        ):
+                            continue
+                        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+                        with z.open(member) as f, open(output_file, "wb") as out:
+                            shutil.copyfileobj(f, out, 1 << 20)
+            if os.path.exists(document_dir):
+                os.replace(document_dir, old_dir)
+            os.replace(tmp_dir, document_dir)
         except Exception as e:
             logger.error(f"Error downloading document {doc_id}: {e}")
-            return None
+            raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            shutil.rmtree(old_dir, ignore_errors=True)
         logger.info(f"Downloaded {doc_id}.xbrl to {output_dir}")
 
     def _download_document_in_tsv(self, doc_id: str, output_dir: str = "data") -> None:
-        """Retrieve a specific document from EDINET API. type: 5 for CSV"""
-        url = "https://disclosure.edinet-fsa.go.jp/api/v2/documents/" + doc_id
-        params = {"type": 5, "Subscription-Key": self.edinet_api_key}
+        """
+        Retrieve a specific document from EDINET API. type: 5 for CSV
+
+        Besides the jpcrp TSV, the members matching csv_members are
+        extracted from the same package into csv_dir(output_dir, doc_id),
+        together with a manifest of the extracted members.
+        """
+        output_file = os.path.join(output_dir, f"{doc_id}.tsv")
+        member_dir = csv_dir(output_dir, doc_id)
         try:
-            with requests.get(url, params=params) as res:
-                with tempfile.TemporaryDirectory() as tmp_dir:
-                    with zipfile.ZipFile(io.BytesIO(res.content)) as z:
-                        for file in z.namelist():
-                            if file.startswith("XBRL_TO_CSV/jpcrp") and file.endswith(
-                                ".csv"
-                            ):
-                                z.extract(file, tmp_dir)
-                                output_file = os.path.join(output_dir, f"{doc_id}.tsv")
-                                if not os.path.exists(output_file):
-                                    shutil.move(
-                                        os.path.join(tmp_dir, file),
-                                        output_file,
-                                    )
+            with self._get_document(doc_id, 5) as res, spool_response(res) as spool:
+                with zipfile.ZipFile(spool) as z:
+                    members = []
+                    wrote_tsv = False
+                    for member in z.infolist():
+                        file = member.filename
+                        if not file.startswith("XBRL_TO_CSV/") or member.is_dir():
+                            continue
+                        if file.startswith("XBRL_TO_CSV/jpcrp") and file.endswith(
+                            ".csv"
+                        ):
+                            # Only the first jpcrp member of a package is kept
+                            if not wrote_tsv:
+                                with z.open(member) as f:
+                                    write_atomic(f, output_file)
+                                wrote_tsv = True
+                        name = os.path.basename(file)
+                        if any(
+                            fnmatch.fnmatchcase(name, pattern)
+                            for pattern in self.csv_members
+                        ):
+                            with z.open(member) as f:
+                                write_atomic(f, os.path.join(member_dir, name))
+                            members.append(
+                                {
+                                    "member": file,
+                                    "path": name,
+                                    "bytes": member.file_size,
+                                    "crc32": f"{member.CRC:08x}",
+                                }
+                            )
+            if self.csv_members:
+                # Written last, so it marks a complete extraction
+                manifest = json.dumps(
+                    {
+                        "doc_id": doc_id,
+                        "patterns": self.csv_members,
+                        "members": members,
+                    },
+                    ensure_ascii=False,
+                    indent=4,
+                )
+                write_atomic(
+                    io.BytesIO(manifest.encode("utf-8")),
+                    os.path.join(member_dir, MEMBER_MANIFEST),
+                )
+            if not wrote_tsv:
+                logger.warning(f"{doc_id} has no jpcrp CSV")
+                return None
+            convert_to_parquet(output_file)
         except Exception as e:
             logger.error(f"Error downloading document {doc_id}: {e}")
-            return None
+            raise
         logger.info(f"Downloaded {doc_id}.tsv to {output_dir}")
 
 
+def test_download_csv_members(monkeypatch, tmp_path):
+    monkeypatch.setenv("EDINET_API_KEY", "test")
+    package = io.BytesIO()
+    with zipfile.ZipFile(package, "w") as z:
+        z.writestr(
+            "XBRL_TO_CSV/jpcrp030000-asr-001_E00304-000.csv", "a".encode("utf-16")
+        )
+        z.writestr("XBRL_TO_CSV/jpaud-aar-cn-001_E00304-000.csv", b"audit")
+        z.writestr("XBRL_TO_CSV/jpaud-aai-cc-001_E00304-000.csv", b"internal")
+        z.writestr("XBRL_TO_CSV/jpdei.csv", b"dei")
+
+    class FakeResponse:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def iter_content(self, chunk_size):
+            yield package.getvalue()
+
+    downloader = Downloader(csv_members=["jpaud-aar*.csv"])
+    monkeypatch.setattr(downloader, "_get_document", lambda *args: FakeResponse())
+    monkeypatch.setattr(
+        "edinet2dataset.downloader.convert_to_parquet", lambda file_path: None
+    )
+    # A stale TSV, e.g. one whose size no longer matches the manifest
+    (tmp_path / "S100TEST.tsv").write_bytes(b"stale")
+    downloader.download_document("S100TEST", "tsv", str(tmp_path))
+
+    assert (tmp_path / "S100TEST.tsv").read_bytes() == "a".encode("utf-16")
+    member_dir = csv_dir(str(tmp_path), "S100TEST")
+    assert sorted(os.listdir(member_dir)) == [
+        "jpaud-aar-cn-001_E00304-000.csv",
+        MEMBER_MANIFEST,
+    ]
+    with open(os.path.join(member_dir, MEMBER_MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["members"][0]["bytes"] == len(b"audit")
+    assert not downloader.download_missing("S100TEST", "tsv", str(tmp_path))
+    # Other patterns need the package again
+    downloader.csv_members = ("jpaud*.csv",)
+    assert downloader.members_missing(str(tmp_path), "S100TEST")
+
+
+def test_download_xbrl(monkeypatch, tmp_path):
+    monkeypatch.setenv("EDINET_API_KEY", "test")
+    monkeypatch.chdir(tmp_path)
+    package = io.BytesIO()
+    with zipfile.ZipFile(package, "w") as z:
+        z.writestr("XBRL/PublicDoc/report.xbrl", b"<xbrl/>")
+        z.writestr("../escaped.txt", b"outside")
+
+    class FakeResponse:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def iter_content(self, chunk_size):
+            yield package.getvalue()
+
+    downloader = Downloader()
+    monkeypatch.setattr(downloader, "_get_document", lambda *args: FakeResponse())
+    # A relative, non-normalized output directory still keeps its members
+    downloader.download_document("S100TEST", "xbrl", "./out")
+
+    assert (tmp_path / "out/S100TEST/XBRL/PublicDoc/report.xbrl").exists()
+    assert not (tmp_path / "out/escaped.txt").exists()
+
+    # Downloading again replaces the whole package
+    (tmp_path / "out/S100TEST/partial.xbrl").write_bytes(b"")
+    downloader.download_document("S100TEST", "xbrl", "./out")
+    assert os.listdir(tmp_path / "out") == ["S100TEST"]
+    assert os.listdir(tmp_path / "out/S100TEST") == ["XBRL"]
+
+
+def test_iter_results(monkeypatch):
+    monkeypatch.setenv("EDINET_API_KEY", "test")
+    listed = []
+
+    def get_listing(date):
+        listed.append(date)
+        row = dict.fromkeys(field.name for field in fields(Result))
+        row.update(ordinanceCode="010", formCode="030000", withdrawalStatus="0")
+        return {
+            "results": [
+                {**row, "docID": f"S{date:%m%d}A", "edinetCode": "E02144"},
+                {**row, "docID": f"S{date:%m%d}B", "edinetCode": "E00304"},
+                {**row, "docID": f"S{date:%m%d}C", "formCode": "043000"},
+                {**row, "docID": f"S{date:%m%d}D", "withdrawalStatus": "1"},
+            ]
+        }
+
+    downloader = Downloader(list_concurrency=2)
+    monkeypatch.setattr(downloader, "get_listing", get_listing)
+    results = downloader.iter_results(
+        "2024-06-01",
+        "2024-06-30",
+        edinet_code=["E02144", None],
+        doc_type="annual",
+        include_withdrawn=False,
+    )
+    assert next(results).docID == "S0601A"
+    # Only the days within the look-ahead window have been listed
+    assert len(listed) <= 3
+    results.close()
+
+    doc_ids = [
+        result.docID
+        for result in downloader.iter_results("2024-06-01", "2024-06-02", "E02144")
+    ]
+    assert doc_ids == ["S0601A", "S0602A"]
+
+
+def test_fetch_listing(monkeypatch, tmp_path):
+    monkeypatch.setenv("EDINET_API_KEY", "test")
+    requests_sent = []
+
+    def get_response(url, date, type, key):
+        requests_sent.append((date, type))
+        count = 0 if date.weekday() == 6 else 1
+        metadata = {"status": "200", "resultset": {"count": count}}
+        if type == 1:
+            return {"metadata": metadata}
+        return {"metadata": metadata, "results": [{"docID": "S100TEST"}] * count}
+
+    downloader = Downloader(
+        listing_cache=ListingCache(str(tmp_path)), closed_days="probe"
+    )
+    monkeypatch.setattr(downloader, "get_response", get_response)
+    saturday, sunday, monday = (datetime.date(2024, 6, d) for d in (15, 16, 17))
+    assert downloader.get_listing(saturday)["results"] == [{"docID": "S100TEST"}]
+    assert downloader.get_listing(sunday)["results"] == []
+    assert downloader.get_listing(monday)["results"] == [{"docID": "S100TEST"}]
+    assert requests_sent == [(saturday, 1), (saturday, 2), (sunday, 1), (monday, 2)]
+    # The empty day is cached like any other listing
+    assert downloader.get_listing(sunday)["results"] == []
+    assert len(requests_sent) == 4
+
+    # By default closed days are not requested at all
+    downloader = Downloader(listing_cache=ListingCache(str(tmp_path / "skip")))
+    monkeypatch.setattr(downloader, "get_response", get_response)
+    requests_sent.clear()
+    assert downloader.get_listing(saturday)["results"] == []
+    assert downloader.get_listing(monday)["results"] == [{"docID": "S100TEST"}]
+    assert requests_sent == [(monday, 2)]
+
+
 def test_download():
     if os.getenv("EDINET_API_KEY") is None:
         return
@@ -248,14 +904,28 @@ def parse_args():
     parser.add_argument(
         "--edinet_code",
         type=str,
-        default=None,
-        help="If specified, download only the document of the company. Otherwise, download all documents.",
+        nargs="+",
+        default=[],
+        help="EDINET codes of the companies to download",
     )
     parser.add_argument(
         "--company_name",
         type=str,
-        default="トヨタ自動車株式会社",
-        help="Company name to search for EDINET code",
+        nargs="+",
+        default=[],
+        help="Names of the companies to download (default: トヨタ自動車株式会社)",
+    )
+    parser.add_argument(
+        "--companies_file",
+        type=str,
+        default=None,
+        help="File with one company name or EDINET code per line",
+    )
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=8,
+        help="Number of documents downloaded at once",
     )
     parser.add_argument(
         "--output_dir", type=str, default="data", help="Output directory"
@@ -268,10 +938,9 @@ def parse_args():
     )
     parser.add_argument(
         "--file_type",
-        type=str,
+        type=parse_file_types,
         default="tsv",
-        help="File type to download",
-        choices=["pdf", "tsv", "xbrl"],
+        help="Comma-separated file types to download, e.g. tsv,pdf,xbrl",
     )
     parser.add_argument(
         "--query",
@@ -279,38 +948,86 @@ def parse_args():
         default=None,
         help="Query string to search for a company name",
     )
+    parser.add_argument(
+        "--list_concurrency",
+        type=int,
+        default=8,
+        help="Number of days whose document lists are requested at once",
+    )
+    parser.add_argument(
+        "--pool_size", type=int, default=16, help="Number of pooled connections"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=120, help="Read timeout in seconds"
+    )
+    parser.add_argument(
+        "--max_retries", type=int, default=3, help="Retries per failed request"
+    )
+    parser.add_argument(
+        "--max_rate", type=float, default=10.0, help="Maximum requests per second"
+    )
+    parser.add_argument(
+        "--listing_cache_dir",
+        type=str,
+        default="data/listings",
+        help="Directory of the cached daily document listings",
+    )
+    parser.add_argument(
+        "--csv_members",
+        type=str,
+        nargs="*",
+        default=[],
+        help="Patterns of CSV members to keep from each TSV package, "
+        "e.g. 'jpcrp*.csv' 'jpaud*.csv'",
+    )
+    parser.add_argument(
+        "--closed_days",
+        choices=CLOSED_DAY_MODES,
+        default="skip",
+        help="How to list weekends and holidays: skip them, probe them for "
+        "documents first, or list them in full",
+    )
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_args()
-    downloader = Downloader()
+    downloader = Downloader(
+        list_concurrency=args.list_concurrency,
+        pool_size=args.pool_size,
+        timeout=(10, args.timeout),
+        max_retries=args.max_retries,
+        listing_cache=ListingCache(args.listing_cache_dir),
+        max_rate=args.max_rate,
+        csv_members=args.csv_members,
+        closed_days=args.closed_days,
+    )
 
     if args.query:
-        result = search_company(downloader.edinet_code_info, args.query)
+        result = search_company(downloader.company_index, args.query)
         if result is None:
             print("No results found.")
             exit()
         print(result)
         exit()
 
-    if args.edinet_code:
-        edinet_code = args.edinet_code
-    else:
-        edinet_code = downloader.get_edinet_code(args.company_name)
-
-    results = downloader.get_results(args.start_date, args.end_date, edinet_code)
-    doc_ids = []
+    companies = args.edinet_code + args.company_name
+    if args.companies_file:
+        with open(args.companies_file, encoding="utf-8") as f:
+            companies += [line.strip() for line in f if line.strip()]
+    if not companies:
+        companies = ["トヨタ自動車株式会社"]
 
-    for result in results:
-        if (
-            downloader.get_doc_type(result.ordinanceCode, result.formCode)
-            == args.doc_type
-        ):
-            doc_ids.append(result.docID)
-
-    output_dir = os.path.join(args.output_dir, edinet_code)
-    os.makedirs(output_dir, exist_ok=True)
-    downloader.download_document(
-        doc_ids[0], file_type=args.file_type, output_dir=output_dir
+    edinet_codes = downloader.resolve_companies(companies)
+    doc_ids = downloader.download_companies(
+        edinet_codes,
+        args.start_date,
+        args.end_date,
+        doc_type=args.doc_type,
+        file_type=args.file_type,
+        output_dir=args.output_dir,
+        max_workers=args.max_workers,
+    )
+    logger.info(
+        f"✅ Downloaded {len(doc_ids)} documents of {len(edinet_codes)} companies"
     )
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+
+import polars as pl
+
+from edinet2dataset.element_id_table import SHEETS
+
+# Sheets whose values are free text rather than amounts
+TEXT_SHEETS = ("META", "TEXT")
+
+
+@dataclass(frozen=True)
+class ElementEntry:
+    sheet: str
+    element_id: str
+    ifrs_element_id: str
+    label: str
+    path: tuple[str, ...]
+    kind: str  # "numeric" or "text"
+
+
+def _walk(sheet: dict, path: tuple[str, ...] = ()):
+    """Yield (element_id, label, path) for every leaf of a nested sheet."""
+    for key, value in sheet.items():
+        if isinstance(value, dict):
+            yield from _walk(value, path + (key,))
+        else:
+            yield key, value, path
+
+
+class ElementCatalog:
+    """
+    Flattened view of the element ID tables.
+
+    ``frame`` holds one row per leaf element in table order. ``join_frame``
+    holds one row per matchable local name (the element ID and its IFRS
+    variant) and is what the parser joins reports against.
+    """
+
+    def __init__(self, sheets: dict[str, dict]):
+        self.sheet_names = list(sheets)
+        self.entries: list[ElementEntry] = []
+        sheet_orders = []
+        element_orders = []
+        for sheet_order, (sheet_name, sheet) in enumerate(sheets.items()):
+            kind = "text" if sheet_name in TEXT_SHEETS else "numeric"
+            for element_order, (element_id, label, path) in enumerate(_walk(sheet)):
+                self.entries.append(
+                    ElementEntry(
+                        sheet=sheet_name,
+                        element_id=element_id,
+                        ifrs_element_id=f"{element_id}IFRS",
+                        label=label,
+                        path=path,
+                        kind=kind,
+                    )
+                )
+                sheet_orders.append(sheet_order)
+                element_orders.append(element_order)
+
+        self.frame = pl.DataFrame(
+            {
+                "sheet": [e.sheet for e in self.entries],
+                "sheet_order": sheet_orders,
+                "element_order": element_orders,
+                "element_id": [e.element_id for e in self.entries],
+                "ifrs_element_id": [e.ifrs_element_id for e in self.entries],
+                "label": [e.label for e in self.entries],
+                "path": [list(e.path) for e in self.entries],
+                "kind": [e.kind for e in self.entries],
+            },
+            schema_overrides={"path": pl.List(pl.String)},
+        )
+        self.join_frame = (
+            self.frame.with_columns(
+                pl.concat_list("element_id", "ifrs_element_id").alias("local_name")
+            )
+            .explode("local_name")
+            .select(
+                "sheet",
+                "sheet_order",
+                "element_order",
+                "label",
+                "kind",
+                "local_name",
+            )
+        )
+
+        # local name -> row indices into entries / frame
+        self._index: dict[str, list[int]] = {}
+        self._sheet_index: dict[str, list[ElementEntry]] = {
+            sheet_name: [] for sheet_name in self.sheet_names
+        }
+        for i, entry in enumerate(self.entries):
+            for local_name in (entry.element_id, entry.ifrs_element_id):
+                self._index.setdefault(local_name, []).append(i)
+            self._sheet_index[entry.sheet].append(entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, local_name: str) -> bool:
+        return local_name in self._index
+
+    def lookup(self, local_name: str) -> list[ElementEntry]:
+        """Return all entries matching a local name such as ``NetSales``."""
+        return [self.entries[i] for i in self._index.get(local_name, [])]
+
+    def elements(self, sheet_name: str) -> list[ElementEntry]:
+        """Return the entries of one sheet in table order."""
+        return list(self._sheet_index[sheet_name])
+
+    @property
+    def local_names(self) -> pl.Series:
+        return self.join_frame["local_name"]
+
+
+ELEMENT_CATALOG = ElementCatalog(SHEETS)
+
+
+def test_element_catalog():
+    (entry,) = ELEMENT_CATALOG.lookup("CashAndDepositsIFRS")
+    assert entry.sheet == "BS"
+    assert entry.element_id == "CashAndDeposits"
+    assert entry.path == ("資産", "流動資産")
+    assert entry.kind == "numeric"
+    assert {e.sheet for e in ELEMENT_CATALOG.lookup("CashAndCashEquivalents")} == {
+        "BS",
+        "CF",
+    }
+    assert ELEMENT_CATALOG.join_frame.height == 2 * len(ELEMENT_CATALOG)
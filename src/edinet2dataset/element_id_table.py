@@ -383,3 +383,14 @@ CF = {
         "CashAndCashEquivalents": "現金及び現金同等物",
     },
 }
+
+
+# Sheets extracted by the parser, in output order
+SHEETS = {
+    "META": META,
+    "SUMMARY": SUMMARY,
+    "TEXT": TEXT,
+    "BS": BS,
+    "PL": PL,
+    "CF": CF,
+}
@@ -0,0 +1,188 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import shutil
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+import polars as pl
+from loguru import logger
+from tqdm import tqdm
+
+from edinet2dataset.element_catalog import ELEMENT_CATALOG
+from edinet2dataset.parser import Parser, add_typed_values, split_element_id
+from edinet2dataset.reader import read_report
+
+
+def extract_facts(file_path) -> pl.DataFrame:
+    """
+    Return one row per catalog element and context found in a report.
+
+    Unlike parse_tsv this keeps every context, consolidated or not, so the
+    consolidation column can be filtered on later. Summary rows are marked
+    その他 in 連結・個別, so their non-consolidated contexts are mapped to 個別.
+    int_value and float_value are the typed copies of value from
+    add_typed_values.
+    """
+    df = read_report(file_path)
+    doc_id = os.path.splitext(os.path.basename(file_path))[0]
+    edinet_code = Parser.filter_by_element_ids(df, ["EDINETCodeDEI"])["値"]
+    edinet_code = (
+        edinet_code[0]
+        if len(edinet_code)
+        else os.path.basename(os.path.dirname(file_path))
+    )
+
+    df = split_element_id(df)
+    df = df.filter(pl.col("local_name").is_in(ELEMENT_CATALOG.local_names.implode()))
+    df = Parser.unique_element_list(df)
+    df = df.join(ELEMENT_CATALOG.join_frame, on="local_name", how="inner")
+    df = add_typed_values(df)
+    return df.select(
+        pl.lit(doc_id).alias("doc_id"),
+        pl.lit(edinet_code).alias("edinet_code"),
+        pl.col("sheet"),
+        pl.col("要素ID").alias("element_id"),
+        pl.col("label"),
+        pl.col("コンテキストID").alias("context_id"),
+        pl.col("コンテキストID")
+        .str.extract(r"^(.*?)(?:Instant|Duration)")
+        .alias("year"),
+        pl.when(pl.col("コンテキストID").str.contains("NonConsolidatedMember"))
+        .then(pl.lit("個別"))
+        .otherwise(pl.col("連結・個別"))
+        .alias("consolidation"),
+        pl.col("ユニットID").alias("unit"),
+        pl.col("値").alias("value"),
+        pl.col("整数値").alias("int_value"),
+        pl.col("実数値").alias("float_value"),
+    )
+
+
+def _extract_one(file_path: str) -> pl.DataFrame | None:
+    try:
+        return extract_facts(file_path)
+    except Exception as e:
+        logger.error(f"Failed to extract facts from {file_path}: {e}")
+        return None
+
+
+def _write_batch(frames: list[pl.DataFrame], output_dir: str, part: int) -> None:
+    df = pl.concat(frames)
+    for (sheet,), sheet_df in df.group_by(["sheet"]):
+        sheet_dir = os.path.join(output_dir, f"sheet={sheet}")
+        os.makedirs(sheet_dir, exist_ok=True)
+        sheet_df.drop("sheet").sort(["edinet_code", "doc_id"]).write_parquet(
+            os.path.join(sheet_dir, f"part-{part:05d}.parquet"),
+            compression="zstd",
+        )
+
+
+def _iter_facts(
+    file_paths: list[str], workers: int | None
+) -> Iterator[pl.DataFrame | None]:
+    if workers == 1:
+        yield from map(_extract_one, file_paths)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        yield from executor.map(_extract_one, file_paths, chunksize=8)
+
+
+def build_fact_table(
+    corpus_dir: str,
+    output_dir: str = "fact_table",
+    workers: int | None = None,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Build a long-format fact table from every TSV under corpus_dir.
+
+    The table is written as Parquet partitioned by sheet
+    (``output_dir/sheet=BS/part-00000.parquet``), each part holding the facts
+    of up to batch_size filings. It is built in a temporary directory that
+    replaces output_dir at the end, so parts of an earlier build never mix
+    with the new ones. Returns the number of filings written.
+    """
+    file_paths = sorted(
+        glob.glob(os.path.join(corpus_dir, "**", "*.tsv"), recursive=True)
+    )
+    logger.info(f"Building fact table from {len(file_paths)} TSV files")
+
+    output_dir = os.path.normpath(output_dir)
+    tmp_dir = f"{output_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        frames = []
+        part = 0
+        written = 0
+        for df in tqdm(_iter_facts(file_paths, workers), total=len(file_paths)):
+            if df is None or df.is_empty():
+                continue
+            frames.append(df)
+            if len(frames) >= batch_size:
+                _write_batch(frames, tmp_dir, part)
+                written += len(frames)
+                frames = []
+                part += 1
+        if frames:
+            _write_batch(frames, tmp_dir, part)
+            written += len(frames)
+
+        old_dir = f"{output_dir}.{os.getpid()}.old"
+        if os.path.exists(output_dir):
+            os.replace(output_dir, old_dir)
+        os.replace(tmp_dir, output_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return written
+
+
+def scan_fact_table(output_dir: str = "fact_table") -> pl.LazyFrame:
+    """Lazily scan a fact table, with sheet available as a partition column."""
+    return pl.scan_parquet(
+        os.path.join(output_dir, "**", "*.parquet"), hive_partitioning=True
+    )
+
+
+def test_build_fact_table(tmp_path):
+    assert build_fact_table("data", str(tmp_path), workers=1, batch_size=4) == 9
+    facts = scan_fact_table(str(tmp_path))
+    net_sales = (
+        facts.filter(
+            (pl.col("sheet") == "SUMMARY")
+            & (pl.col("doc_id") == "S100ISXG")
+            & (pl.col("element_id") == "jpcrp_cor:NetSalesSummaryOfBusinessResults")
+            & (pl.col("year") == "CurrentYear")
+            & (pl.col("consolidation") != "個別")
+        )
+        .select("edinet_code", "value", "int_value")
+        .collect()
+    )
+    assert net_sales.rows() == [("E00304", "27225613000", 27225613000)]
+
+    # Rebuilding replaces the parts of the previous build
+    rows = facts.select(pl.len()).collect().item()
+    assert build_fact_table("data", str(tmp_path), workers=1, batch_size=3) == 9
+    assert scan_fact_table(str(tmp_path)).select(pl.len()).collect().item() == rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser("Build a long-format fact table from TSVs")
+    parser.add_argument("--corpus_dir", type=str, default="edinet_corpus")
+    parser.add_argument("--output_dir", type=str, default="fact_table")
+    parser.add_argument("--max_workers", type=int, default=None)
+    parser.add_argument("--batch_size", type=int, default=1000)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    written = build_fact_table(
+        args.corpus_dir, args.output_dir, args.max_workers, args.batch_size
+    )
+    logger.info(f"✅ Wrote facts of {written} filings to {args.output_dir}")
@@ -0,0 +1,185 @@
+import argparse
+import os
+from pathlib import Path
+
+import polars as pl
+from loguru import logger
+
+from edinet2dataset.downloader import Downloader
+from edinet2dataset.schema import RESULT_SCHEMA, Result, decode_results
+
+
+def results_to_frame(results: list[Result]) -> pl.DataFrame:
+    """Build a frame with one row per Result and a doc_type column."""
+    return decode_results([result.to_dict() for result in results])
+
+
+class FilingIndex:
+    """
+    Local Parquet index of the Result records of the EDINET listings.
+
+    Rows are kept sorted by edinetCode and submitDateTime, so the row group
+    statistics let polars skip most of the file for company queries. The
+    index answers questions like "all annual reports of E02144" without the
+    API and tells which of them are not downloaded yet.
+    """
+
+    def __init__(self, path: str = "data/filing_index.parquet"):
+        self.path = Path(path)
+        self._frame = None
+
+    @property
+    def frame(self) -> pl.DataFrame:
+        if self._frame is None:
+            if self.path.exists():
+                self._frame = pl.read_parquet(self.path)
+            else:
+                self._frame = results_to_frame([])
+        return self._frame
+
+    def add(self, results: list[Result] | pl.DataFrame) -> int:
+        """
+        Add listing results, either Result objects or a frame decoded by
+        decode_results, replacing older records of the same docID.
+        """
+        new = (
+            results if isinstance(results, pl.DataFrame) else results_to_frame(results)
+        )
+        frame = (
+            pl.concat([self.frame, new])
+            .unique(subset="docID", keep="last", maintain_order=True)
+            .sort(["edinetCode", "submitDateTime"], nulls_last=True)
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        frame.write_parquet(tmp_path, compression="zstd", row_group_size=16384)
+        os.replace(tmp_path, self.path)
+        self._frame = frame
+        return new.height
+
+    def query(
+        self,
+        edinet_code: str | None = None,
+        sec_code: str | None = None,
+        doc_type: str | None = None,
+        doc_type_code: str | None = None,
+        form_code: str | None = None,
+        period_end: tuple[str, str] | None = None,
+        submitted: tuple[str, str] | None = None,
+        include_withdrawn: bool = False,
+    ) -> pl.DataFrame:
+        """
+        Return the filings matching every given condition.
+
+        period_end and submitted are inclusive (start, end) date strings,
+        e.g. ``submitted=("2021-01-01", "2021-12-31")``.
+        """
+        predicate = pl.lit(True)
+        for column, value in [
+            ("edinetCode", edinet_code),
+            ("secCode", sec_code),
+            ("doc_type", doc_type),
+            ("docTypeCode", doc_type_code),
+            ("formCode", form_code),
+        ]:
+            if value is not None:
+                predicate &= pl.col(column) == value
+        if period_end is not None:
+            start, end = period_end
+            predicate &= pl.col("periodEnd").is_between(pl.lit(start), pl.lit(end))
+        if submitted is not None:
+            start, end = submitted
+            # submitDateTime is "YYYY-MM-DD hh:mm"
+            predicate &= (
+                pl.col("submitDateTime")
+                .str.slice(0, 10)
+                .is_between(pl.lit(start), pl.lit(end))
+            )
+        if not include_withdrawn:
+            predicate &= pl.col("withdrawalStatus") != "1"
+        return self.frame.filter(predicate)
+
+    @staticmethod
+    def missing(
+        filings: pl.DataFrame, output_dir: str, file_types: tuple[str, ...] = ("tsv",)
+    ) -> pl.DataFrame:
+        """
+        Return the filings of which some file is not in output_dir, laid out
+        as prepare_edinet_corpus writes it (doc_type/edinetCode/docID.ext).
+        """
+        if filings.is_empty():
+            return filings
+        present = [
+            all(
+                os.path.exists(
+                    os.path.join(output_dir, doc_type, edinet_code, f"{doc_id}.{ext}")
+                )
+                for ext in file_types
+            )
+            for doc_type, edinet_code, doc_id in filings.select(
+                "doc_type", "edinetCode", "docID"
+            ).iter_rows()
+        ]
+        return filings.filter(~pl.Series(present))
+
+
+def test_filing_index(tmp_path):
+    def result(doc_id, edinet_code, form_code, submitted):
+        values = dict.fromkeys(RESULT_SCHEMA)
+        values.update(
+            seqNumber=1,
+            docID=doc_id,
+            edinetCode=edinet_code,
+            ordinanceCode="010",
+            formCode=form_code,
+            submitDateTime=submitted,
+            withdrawalStatus="0",
+        )
+        return Result(**values)
+
+    index = FilingIndex(str(tmp_path / "index.parquet"))
+    index.add(
+        [
+            result("S100A", "E02144", "030000", "2021-06-20 09:00"),
+            result("S100B", "E02144", "030001", "2021-08-01 09:00"),
+            result("S100C", "E00304", "030000", "2022-06-20 09:00"),
+        ]
+    )
+    index.add([result("S100C", "E00304", "030000", "2022-06-21 09:00")])
+
+    index = FilingIndex(str(tmp_path / "index.parquet"))
+    assert index.frame.height == 3
+    assert index.query(edinet_code="E02144", doc_type="annual")["docID"].to_list() == [
+        "S100A"
+    ]
+    amended = index.query(
+        doc_type="annual_amended", submitted=("2021-01-01", "2021-12-31")
+    )
+    assert amended["docID"].to_list() == ["S100B"]
+    assert index.query(edinet_code="E00304")["submitDateTime"][0] == "2022-06-21 09:00"
+
+    output_dir = tmp_path / "corpus"
+    (output_dir / "annual" / "E02144").mkdir(parents=True)
+    (output_dir / "annual" / "E02144" / "S100A.tsv").touch()
+    missing = FilingIndex.missing(index.query(doc_type="annual"), str(output_dir))
+    assert missing["docID"].to_list() == ["S100C"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser("Build or query the local filing index")
+    parser.add_argument("--index_path", type=str, default="data/filing_index.parquet")
+    parser.add_argument("--start_date", type=str, default=None)
+    parser.add_argument("--end_date", type=str, default=None)
+    parser.add_argument("--edinet_code", type=str, default=None)
+    parser.add_argument("--doc_type", type=str, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    index = FilingIndex(args.index_path)
+    if args.start_date and args.end_date:
+        frames = Downloader().iter_result_frames(args.start_date, args.end_date)
+        added = index.add(pl.concat(frames))
+        logger.info(f"✅ Indexed {added} filings in {args.index_path}")
+    print(index.query(edinet_code=args.edinet_code, doc_type=args.doc_type))
@@ -0,0 +1,140 @@
+import datetime
+import functools
+
+# Days on which the Tokyo Stock Exchange is closed besides weekends and
+# national holidays (年末年始)
+MARKET_CLOSED = {(1, 2), (1, 3), (12, 31)}
+
+# Holidays moved for the Tokyo Olympics
+OLYMPIC_HOLIDAYS = {
+    2020: {(7, 23): "海の日", (7, 24): "スポーツの日", (8, 10): "山の日"},
+    2021: {(7, 22): "海の日", (7, 23): "スポーツの日", (8, 8): "山の日"},
+}
+
+# One-off holidays of the imperial succession
+SPECIAL_HOLIDAYS = {
+    datetime.date(2019, 4, 30): "国民の休日",
+    datetime.date(2019, 5, 1): "天皇の即位の日",
+    datetime.date(2019, 5, 2): "国民の休日",
+    datetime.date(2019, 10, 22): "即位礼正殿の儀の行われる日",
+}
+
+
+def nth_monday(year: int, month: int, n: int) -> datetime.date:
+    first = datetime.date(year, month, 1)
+    return first + datetime.timedelta(days=(7 - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def vernal_equinox_day(year: int) -> int:
+    """Day of March of the vernal equinox (accurate for 1980-2099)."""
+    return int(20.8431 + 0.242194 * (year - 1980) - (year - 1980) // 4)
+
+
+def autumnal_equinox_day(year: int) -> int:
+    """Day of September of the autumnal equinox (accurate for 1980-2099)."""
+    return int(23.2488 + 0.242194 * (year - 1980) - (year - 1980) // 4)
+
+
+@functools.cache
+def japanese_holidays(year: int) -> dict[datetime.date, str]:
+    """
+    National holidays of a year under the Act on National Holidays,
+    computed offline for 2000 onwards, including substitute holidays
+    (振替休日, by the rule in force since 2007) and days between two
+    holidays (国民の休日).
+    """
+
+    def date(month, day):
+        return datetime.date(year, month, day)
+
+    holidays = {
+        date(1, 1): "元日",
+        nth_monday(year, 1, 2): "成人の日",
+        date(2, 11): "建国記念の日",
+        date(3, vernal_equinox_day(year)): "春分の日",
+        date(4, 29): "昭和の日" if year >= 2007 else "みどりの日",
+        date(5, 3): "憲法記念日",
+        date(5, 5): "こどもの日",
+        date(9, autumnal_equinox_day(year)): "秋分の日",
+        date(11, 3): "文化の日",
+        date(11, 23): "勤労感謝の日",
+    }
+    if year >= 2007:
+        holidays[date(5, 4)] = "みどりの日"
+    if 1989 <= year <= 2018:
+        holidays[date(12, 23)] = "天皇誕生日"
+    elif year >= 2020:
+        holidays[date(2, 23)] = "天皇誕生日"
+
+    if year in OLYMPIC_HOLIDAYS:
+        for (month, day), name in OLYMPIC_HOLIDAYS[year].items():
+            holidays[date(month, day)] = name
+    else:
+        holidays[nth_monday(year, 7, 3) if year >= 2003 else date(7, 20)] = "海の日"
+        holidays[nth_monday(year, 10, 2)] = (
+            "スポーツの日" if year >= 2020 else "体育の日"
+        )
+        if year >= 2016:
+            holidays[date(8, 11)] = "山の日"
+    holidays[nth_monday(year, 9, 3) if year >= 2003 else date(9, 15)] = "敬老の日"
+    holidays.update(
+        (day, name) for day, name in SPECIAL_HOLIDAYS.items() if day.year == year
+    )
+
+    # A weekday between two holidays is a holiday too
+    one_day = datetime.timedelta(days=1)
+    for day in sorted(holidays):
+        between = day + one_day
+        if (
+            between + one_day in holidays
+            and between not in holidays
+            and between.weekday() != 6
+        ):
+            holidays[between] = "国民の休日"
+
+    # A holiday on a Sunday moves to the next day that is not a holiday
+    for day in sorted(holidays):
+        if day.weekday() == 6:
+            substitute = day + one_day
+            while substitute in holidays:
+                substitute += one_day
+            holidays[substitute] = "振替休日"
+    return dict(sorted(holidays.items()))
+
+
+def is_holiday(date: datetime.date) -> bool:
+    return date in japanese_holidays(date.year)
+
+
+def is_business_day(date: datetime.date) -> bool:
+    """Whether the Tokyo Stock Exchange is open on date."""
+    return (
+        date.weekday() < 5
+        and not is_holiday(date)
+        and (date.month, date.day) not in MARKET_CLOSED
+    )
+
+
+def test_japanese_holidays():
+    holidays = japanese_holidays(2024)
+    assert len(holidays) == 21
+    assert holidays[datetime.date(2024, 2, 12)] == "振替休日"
+    assert holidays[datetime.date(2024, 3, 20)] == "春分の日"
+    assert holidays[datetime.date(2024, 9, 23)] == "振替休日"
+    assert japanese_holidays(2019)[datetime.date(2019, 5, 1)] == "天皇の即位の日"
+    assert japanese_holidays(2026)[datetime.date(2026, 9, 22)] == "国民の休日"
+    assert japanese_holidays(2021)[datetime.date(2021, 8, 9)] == "振替休日"
+    assert datetime.date(2021, 10, 11) not in japanese_holidays(2021)
+
+    assert is_business_day(datetime.date(2024, 6, 28))
+    assert not is_business_day(datetime.date(2024, 6, 29))  # Saturday
+    assert not is_business_day(datetime.date(2024, 5, 6))
+    assert not is_business_day(datetime.date(2024, 12, 31))
+    business_days = [
+        day
+        for day in (
+            datetime.date(2024, 1, 1) + datetime.timedelta(days=i) for i in range(366)
+        )
+        if is_business_day(day)
+    ]
+    assert len(business_days) == 245
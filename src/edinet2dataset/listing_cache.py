@@ -0,0 +1,114 @@
+import datetime
+import fcntl
+import gzip
+import json
+import os
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class ListingCache:
+    """
+    On-disk cache of the daily documents.json listings, one gzipped JSON per
+    date.
+
+    A listing fetched settle_days or more after its date is treated as final
+    and served from disk forever; a listing fetched earlier is re-fetched once
+    it is older than recent_ttl seconds, since filings may still be added or
+    withdrawn. Fetches of the same date are serialized with a file lock, so
+    concurrent processes sharing a cache directory request each date once.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "data/listings",
+        settle_days: int = 7,
+        recent_ttl: float = 3600,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.settle_days = settle_days
+        self.recent_ttl = recent_ttl
+
+    def path(self, date: datetime.date) -> Path:
+        return self.cache_dir / f"{date:%Y}" / f"{date:%Y-%m-%d}.json.gz"
+
+    def is_fresh(self, date: datetime.date, fetched_at: float) -> bool:
+        fetched_date = datetime.date.fromtimestamp(fetched_at)
+        if (fetched_date - date).days >= self.settle_days:
+            return True
+        return time.time() - fetched_at < self.recent_ttl
+
+    def get(self, date: datetime.date) -> dict | None:
+        """Return the cached listing of a date if it is still fresh."""
+        path = self.path(date)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, EOFError, gzip.BadGzipFile, json.JSONDecodeError):
+            return None
+        if not self.is_fresh(date, entry["fetched_at"]):
+            return None
+        return entry["listing"]
+
+    def put(self, date: datetime.date, listing: dict) -> None:
+        path = self.path(date)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"fetched_at": time.time(), "listing": listing}, f)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _lock(self, date: datetime.date):
+        lock_path = self.path(date).with_suffix(".lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_or_fetch(self, date: datetime.date, fetch: Callable[[], dict]) -> dict:
+        """
+        Return the listing of a date, calling fetch only when the cache has no
+        fresh copy. Error responses are returned but not cached.
+        """
+        listing = self.get(date)
+        if listing is not None:
+            return listing
+        with self._lock(date):
+            # Another process may have fetched it while we waited
+            listing = self.get(date)
+            if listing is not None:
+                return listing
+            listing = fetch()
+            if listing.get("metadata", {}).get("status") == "200":
+                self.put(date, listing)
+            return listing
+
+
+def test_listing_cache(tmp_path):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"metadata": {"status": "200"}, "results": [{"docID": "S100TEST"}]}
+
+    cache = ListingCache(str(tmp_path), settle_days=7, recent_ttl=0)
+    old_day = datetime.date.today() - datetime.timedelta(days=30)
+    assert cache.get_or_fetch(old_day, fetch)["results"] == [{"docID": "S100TEST"}]
+    assert cache.get_or_fetch(old_day, fetch)["results"] == [{"docID": "S100TEST"}]
+    assert len(calls) == 1
+
+    # A listing of today is not settled and is fetched again after recent_ttl
+    today = datetime.date.today()
+    cache.get_or_fetch(today, fetch)
+    cache.get_or_fetch(today, fetch)
+    assert len(calls) == 3
+
+    # Error responses are not cached
+    cache.get_or_fetch(old_day - datetime.timedelta(days=1), lambda: {"status": 401})
+    assert cache.get(old_day - datetime.timedelta(days=1)) is None
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import fields
+
+from edinet2dataset.schema import Result
+
+STATES = ("queued", "downloading", "done", "failed")
+
+
+def file_digest(file_path) -> tuple[int, str]:
+    """Return the size and SHA-256 of a file."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+            size += len(block)
+    return size, digest.hexdigest()
+
+
+class DownloadManifest:
+    """
+    Durable record of a bulk download, one row per docID and format.
+
+    Each file moves through queued -> downloading -> done or failed, and a
+    finished file records its size and SHA-256. The Result of every queued
+    filing and its output directory are stored as well, so an interrupted
+    crawl can be resumed from the manifest alone. The connection is shared
+    by the download threads behind a lock.
+    """
+
+    def __init__(self, path: str = "data/download_manifest.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS filings (
+                doc_id TEXT PRIMARY KEY,
+                output_dir TEXT,
+                result TEXT
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                doc_id TEXT,
+                format TEXT,
+                state TEXT,
+                bytes INTEGER,
+                sha256 TEXT,
+                error TEXT,
+                attempts INTEGER DEFAULT 0,
+                updated_at REAL,
+                PRIMARY KEY (doc_id, format)
+            );
+            CREATE INDEX IF NOT EXISTS files_state ON files (state);
+            """
+        )
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self._lock, self.conn:
+            return self.conn.execute(sql, params).fetchall()
+
+    def enqueue(self, result: Result, output_dir: str, formats: list[str]) -> None:
+        """Queue the given formats of a filing unless they are already known."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO filings VALUES (?, ?, ?)",
+                (
+                    result.docID,
+                    output_dir,
+                    json.dumps(result.to_dict(), ensure_ascii=False),
+                ),
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO files (doc_id, format, state, updated_at) "
+                "VALUES (?, ?, 'queued', ?)",
+                [(result.docID, file_format, time.time()) for file_format in formats],
+            )
+
+    def state(self, doc_id: str, file_format: str) -> str | None:
+        return self.record(doc_id, file_format)[0]
+
+    def record(self, doc_id: str, file_format: str) -> tuple[str | None, int | None]:
+        """Return the state and recorded size of a file, (None, None) if unknown."""
+        rows = self._execute(
+            "SELECT state, bytes FROM files WHERE doc_id = ? AND format = ?",
+            (doc_id, file_format),
+        )
+        return rows[0] if rows else (None, None)
+
+    def needs_download(self, doc_id: str, file_format: str, file_path: str) -> bool:
+        """
+        Whether a file still has to be downloaded to file_path. A file done
+        with a recorded size must still be there with that size. A file
+        whose download started or failed is fetched again, since it may be
+        partial; one the manifest has not seen start is skipped if it is
+        already on disk.
+        """
+        state, size = self.record(doc_id, file_format)
+        if state in ("downloading", "failed"):
+            return True
+        if state == "done":
+            return size is not None and (
+                not os.path.isfile(file_path) or os.path.getsize(file_path) != size
+            )
+        if os.path.isdir(file_path):
+            return not any(os.scandir(file_path))
+        return not (os.path.isfile(file_path) and os.path.getsize(file_path) > 0)
+
+    def start(self, doc_id: str, file_format: str) -> None:
+        self._execute(
+            "UPDATE files SET state = 'downloading', attempts = attempts + 1, "
+            "error = NULL, updated_at = ? WHERE doc_id = ? AND format = ?",
+            (time.time(), doc_id, file_format),
+        )
+
+    def done(self, doc_id: str, file_format: str, file_path: str | None) -> None:
+        """
+        Mark a file as downloaded; file_path is None if there was nothing.
+        Directories, such as extracted XBRL packages, are recorded without
+        a size.
+        """
+        size, sha256 = (
+            file_digest(file_path)
+            if file_path and os.path.isfile(file_path)
+            else (None, None)
+        )
+        self._execute(
+            "UPDATE files SET state = 'done', bytes = ?, sha256 = ?, updated_at = ? "
+            "WHERE doc_id = ? AND format = ?",
+            (size, sha256, time.time(), doc_id, file_format),
+        )
+
+    def fail(self, doc_id: str, file_format: str, error: str) -> None:
+        self._execute(
+            "UPDATE files SET state = 'failed', error = ?, updated_at = ? "
+            "WHERE doc_id = ? AND format = ?",
+            (error, time.time(), doc_id, file_format),
+        )
+
+    def remaining(self) -> list[tuple[Result, str, list[str]]]:
+        """
+        Return (result, output_dir, formats) for every filing with a file
+        that is not done. Files left in downloading by a crash are included.
+        """
+        rows = self._execute(
+            "SELECT filings.result, filings.output_dir, files.format "
+            "FROM files JOIN filings USING (doc_id) "
+            "WHERE files.state != 'done' ORDER BY files.doc_id, files.format"
+        )
+        remaining = {}
+        for result, output_dir, file_format in rows:
+            result = Result.from_json(json.loads(result))
+            entry = remaining.setdefault(result.docID, (result, output_dir, []))
+            entry[2].append(file_format)
+        return list(remaining.values())
+
+    def summary(self) -> dict[str, int]:
+        """Number of files in each state."""
+        counts = dict(self._execute("SELECT state, COUNT(*) FROM files GROUP BY state"))
+        return {state: counts.get(state, 0) for state in STATES}
+
+
+def test_download_manifest(tmp_path):
+    values = dict.fromkeys(field.name for field in fields(Result))
+    values.update(seqNumber=1, docID="S100TEST", edinetCode="E00304")
+    result = Result(**values)
+
+    manifest = DownloadManifest(str(tmp_path / "manifest.sqlite"))
+    manifest.enqueue(result, str(tmp_path), ["tsv", "pdf"])
+    assert manifest.summary()["queued"] == 2
+
+    tsv_path = tmp_path / "S100TEST.tsv"
+    tsv_path.write_bytes(b"abc")
+    manifest.start("S100TEST", "tsv")
+    manifest.done("S100TEST", "tsv", str(tsv_path))
+    manifest.start("S100TEST", "pdf")
+    manifest.fail("S100TEST", "pdf", "HTTPError")
+
+    # Queuing again keeps the recorded state
+    manifest.enqueue(result, str(tmp_path), ["tsv", "pdf"])
+    manifest = DownloadManifest(str(tmp_path / "manifest.sqlite"))
+    assert manifest.state("S100TEST", "tsv") == "done"
+    assert manifest.summary() == {
+        "queued": 0,
+        "downloading": 0,
+        "done": 1,
+        "failed": 1,
+    }
+    assert not manifest.needs_download("S100TEST", "tsv", str(tsv_path))
+    tsv_path.write_bytes(b"abcd")
+    assert manifest.needs_download("S100TEST", "tsv", str(tsv_path))
+    # A failed download may have left part of the file behind
+    (tmp_path / "S100TEST.pdf").write_bytes(b"%PDF")
+    assert manifest.needs_download("S100TEST", "pdf", str(tmp_path / "S100TEST.pdf"))
+    # Files finished before the manifest existed are taken as they are
+    xbrl_dir = tmp_path / "S100TEST"
+    assert manifest.needs_download("S100TEST", "xbrl", str(xbrl_dir))
+    xbrl_dir.mkdir()
+    (xbrl_dir / "manifest.xml").write_text("a")
+    assert not manifest.needs_download("S100TEST", "xbrl", str(xbrl_dir))
+    [(remaining_result, output_dir, formats)] = manifest.remaining()
+    assert remaining_result == result
+    assert (output_dir, formats) == (str(tmp_path), ["pdf"])
+    assert manifest.conn.execute(
+        "SELECT bytes, sha256 FROM files WHERE format = 'tsv'"
+    ).fetchone() == (3, hashlib.sha256(b"abc").hexdigest())
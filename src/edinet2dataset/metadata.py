@@ -0,0 +1,239 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from pathlib import Path
+
+import polars as pl
+from loguru import logger
+from tqdm import tqdm
+
+from edinet2dataset.element_id_table import META
+from edinet2dataset.reader import read_elements
+from edinet2dataset.schema import Result
+
+# DEI / cover page elements stored per filing, in columns named after them
+DEI_COLUMNS = [*META, "IdentificationOfDocumentSubjectToAmendmentDEI"]
+# Fields of the API Result saved as <docID>.json next to each report
+RESULT_COLUMNS = [field.name for field in fields(Result)]
+INDEXED_COLUMNS = [
+    "doc_id",
+    "fiscal_year",
+    "EDINETCodeDEI",
+    "IdentificationOfDocumentSubjectToAmendmentDEI",
+    "edinetCode",
+    "docTypeCode",
+]
+
+
+def read_filing_metadata(tsv_path: str) -> dict:
+    """Read the DEI fields of a report and the Result JSON stored next to it."""
+    df = read_elements(tsv_path, ["jpdei_cor", "jpcrp_cor"], DEI_COLUMNS)
+    row = {column: None for column in DEI_COLUMNS}
+    for element_id, value in df.select("要素ID", "値").iter_rows():
+        local_name = element_id.rpartition(":")[2]
+        # Keep the first context of an element, the filing date one for DEI;
+        # placeholders such as － are stored as NULL
+        if row[local_name] is None and value not in ("", "－"):
+            row[local_name] = value
+
+    json_path = Path(tsv_path).with_suffix(".json")
+    result = {}
+    if json_path.exists():
+        with json_path.open(encoding="utf-8") as f:
+            result = json.load(f)
+    row.update({column: result.get(column) for column in RESULT_COLUMNS})
+
+    start_date = row["CurrentFiscalYearStartDateDEI"]
+    row["fiscal_year"] = int(start_date[:4]) if start_date else None
+    row["doc_id"] = Path(tsv_path).stem
+    return row
+
+
+def _file_state(tsv_path: str) -> tuple[int, int]:
+    stat = os.stat(tsv_path)
+    json_path = Path(tsv_path).with_suffix(".json")
+    json_mtime_ns = json_path.stat().st_mtime_ns if json_path.exists() else 0
+    return stat.st_size, max(stat.st_mtime_ns, json_mtime_ns)
+
+
+def _read_one(tsv_path: str) -> tuple[str, dict | None]:
+    try:
+        return tsv_path, read_filing_metadata(tsv_path)
+    except Exception as e:
+        logger.error(f"Failed to read metadata of {tsv_path}: {e}")
+        return tsv_path, None
+
+
+class MetadataCatalog:
+    """
+    SQLite catalog with one row per downloaded filing.
+
+    Each row holds the META DEI fields, the amendment target and the API
+    Result fields of a report, plus fiscal_year derived from
+    CurrentFiscalYearStartDateDEI. update() only re-reads reports whose TSV
+    or JSON changed since the last run, so the catalog can be refreshed after
+    every download.
+    """
+
+    def __init__(self, path: str = "data/metadata.sqlite"):
+        self.path = path
+        self._conn = None
+        self._pid = None
+
+    @property
+    def columns(self) -> list[str]:
+        return ["doc_id", "fiscal_year", *DEI_COLUMNS, *RESULT_COLUMNS]
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=60)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            column_defs = ", ".join(f'"{column}"' for column in self.columns)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS filings (path TEXT PRIMARY KEY, "
+                f"size INTEGER, mtime_ns INTEGER, {column_defs})"
+            )
+            for column in INDEXED_COLUMNS:
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "filings_{column}" '
+                    f'ON filings ("{column}")'
+                )
+        return self._conn
+
+    def update(self, corpus_dir: str, workers: int | None = None) -> int:
+        """
+        Add new or changed reports under corpus_dir and drop deleted ones.
+
+        Returns the number of reports (re)read.
+        """
+        tsv_paths = {
+            os.path.abspath(tsv_path)
+            for tsv_path in glob.glob(
+                os.path.join(corpus_dir, "**", "*.tsv"), recursive=True
+            )
+        }
+        prefix = os.path.join(os.path.abspath(corpus_dir), "")
+        known = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self.conn.execute(
+                "SELECT path, size, mtime_ns FROM filings WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+        }
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM filings WHERE path = ?",
+                [(path,) for path in known.keys() - tsv_paths],
+            )
+
+        states = {path: _file_state(path) for path in tsv_paths}
+        stale = sorted(path for path in tsv_paths if known.get(path) != states[path])
+        if not stale:
+            return 0
+
+        if workers == 1:
+            results = map(_read_one, stale)
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            results = executor.map(_read_one, stale, chunksize=32)
+        placeholders = ",".join("?" * (len(self.columns) + 3))
+        try:
+            for tsv_path, row in tqdm(results, total=len(stale), desc="Cataloging"):
+                if row is None:
+                    continue
+                with self.conn:
+                    self.conn.execute(
+                        f"INSERT OR REPLACE INTO filings VALUES ({placeholders})",
+                        (
+                            tsv_path,
+                            *states[tsv_path],
+                            *(row[column] for column in self.columns),
+                        ),
+                    )
+        finally:
+            if workers != 1:
+                executor.shutdown(cancel_futures=True)
+        return len(stale)
+
+    def query(self, where: str = "1", params: tuple = ()) -> pl.DataFrame:
+        """Return the filings matching an SQL WHERE clause."""
+        cursor = self.conn.execute(f"SELECT * FROM filings WHERE {where}", params)
+        schema = [description[0] for description in cursor.description]
+        return pl.DataFrame(
+            cursor.fetchall(), schema=schema, orient="row", infer_schema_length=None
+        )
+
+    def filings(self, corpus_dir: str | None = None, **equals) -> pl.DataFrame:
+        """
+        Return the filings whose columns equal the given values, e.g.
+        ``filings(fiscal_year=2019)``, optionally limited to corpus_dir.
+        """
+        unknown = set(equals) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)}")
+        conditions = [f'"{column}" = ?' for column in equals]
+        params = list(equals.values())
+        if corpus_dir is not None:
+            prefix = os.path.join(os.path.abspath(corpus_dir), "")
+            conditions.append("substr(path, 1, ?) = ?")
+            params += [len(prefix), prefix]
+        return self.query(" AND ".join(conditions) or "1", tuple(params))
+
+    def original_doc_id(self, doc_id: str) -> str | None:
+        """Return the doc ID that an amendment report corrects."""
+        row = self.conn.execute(
+            "SELECT IdentificationOfDocumentSubjectToAmendmentDEI "
+            "FROM filings WHERE doc_id = ?",
+            (doc_id,),
+        ).fetchone()
+        return row[0] if row else None
+
+
+def test_metadata_catalog(tmp_path):
+    corpus_dir = tmp_path / "corpus" / "E00304"
+    corpus_dir.mkdir(parents=True)
+    tsv_path = corpus_dir / "S100ISXG.tsv"
+    tsv_path.write_bytes(Path("data/E00304/S100ISXG.tsv").read_bytes())
+    (corpus_dir / "S100ISXG.json").write_text(
+        json.dumps({"docID": "S100ISXG", "docTypeCode": "120"})
+    )
+
+    catalog = MetadataCatalog(str(tmp_path / "metadata.sqlite"))
+    assert catalog.update(str(tmp_path / "corpus"), workers=1) == 1
+    assert catalog.update(str(tmp_path / "corpus"), workers=1) == 0
+
+    filings = catalog.filings(EDINETCodeDEI="E00304")
+    assert filings["doc_id"].to_list() == ["S100ISXG"]
+    assert filings["docTypeCode"].to_list() == ["120"]
+    fiscal_year = filings["fiscal_year"][0]
+    assert catalog.filings(fiscal_year=fiscal_year).height == 1
+    assert catalog.original_doc_id("S100ISXG") is None
+
+    tsv_path.unlink()
+    assert catalog.update(str(tmp_path / "corpus"), workers=1) == 0
+    assert catalog.filings().is_empty()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser("Update the metadata catalog of a corpus")
+    parser.add_argument("--corpus_dir", type=str, default="edinet_corpus")
+    parser.add_argument("--catalog_path", type=str, default="data/metadata.sqlite")
+    parser.add_argument("--max_workers", type=int, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    catalog = MetadataCatalog(args.catalog_path)
+    updated = catalog.update(args.corpus_dir, args.max_workers)
+    logger.info(f"✅ Updated {updated} filings in {args.catalog_path}")
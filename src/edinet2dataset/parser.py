@@ -1,11 +1,18 @@
-import polars as pl
 import argparse
-from edinet2dataset.element_id_table import BS, PL, CF, SUMMARY, META, TEXT
-from dataclasses import dataclass
-from loguru import logger
 import json
+import multiprocessing
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 
+import polars as pl
+from loguru import logger
+
+from edinet2dataset.cache import ParseCache
+from edinet2dataset.element_catalog import ELEMENT_CATALOG
+from edinet2dataset.reader import read_report
 
 
 @dataclass
@@ -51,6 +58,13 @@ class Parser:
             | pl.col("要素ID").str.ends_with(f":{element_id}IFRS")
         )
 
+    @staticmethod
+    def filter_by_element_ids(df, element_ids: list[str]) -> pl.DataFrame:
+        """Filter elements by several element_ids in one pass"""
+        local_names = element_ids + [f"{element_id}IFRS" for element_id in element_ids]
+        df = split_element_id(df)
+        return df.filter(pl.col("local_name").is_in(local_names))
+
     @staticmethod
     def filter_by_consolidation(df) -> pl.DataFrame:
         """Filter elements by consolidation"""
@@ -66,101 +80,354 @@ class Parser:
             subset=["要素ID", "コンテキストID", "相対年度", "連結・個別", "期間・時点"]
         )
 
-    def to_dict(self, df, value: str, contain_year: bool = True) -> dict:
-        years = YEAR_LIST
-        # Initialize the results dictionary
-        results = {}
-        # Iterate through the years
-        for year in years:
-            filtered_df = self.filter_by_year(df, year)
-            if filtered_df.height == 1:
-                if contain_year:
-                    # If contain_year is True, use year as the key
-                    if value not in results:
-                        results[value] = {}
-                    results[value][year] = filtered_df.select("値").to_numpy()[0][
-                        0
-                    ]  # Access the first element
-                else:
-                    # If contain_year is False, just store the value
-                    results[value] = filtered_df.select("値").to_numpy()[0][
-                        0
-                    ]  # Access the first element
-
-        # Remove the value entry from the results if no data was found
-        if value in results and not results[value]:
-            del results[value]
-
-        return results
-
-
-# extract leaf elements from sheet
-def extract_leaf_elements(sheet: dict) -> list:
-    """Extract leaf elements from a sheet."""
-    elements = []
-
-    for key, value in sheet.items():
-        if isinstance(value, dict):
-            elements.extend(extract_leaf_elements(value))
-        else:
-            elements.append({key: value})
 
-    return elements
+def _build_context_table() -> pl.DataFrame:
+    """Map the consolidated context IDs of each year to the year name."""
+    rows = []
+    for year_order, year in enumerate(YEAR_LIST):
+        for suffix in ("Instant", "Duration"):
+            rows.append(
+                {
+                    "コンテキストID": f"{year}{suffix}",
+                    "year": year,
+                    "year_order": year_order,
+                }
+            )
+    return pl.DataFrame(rows)
+
+
+CONTEXT_TABLE = _build_context_table()
+
+
+def split_element_id(df: pl.DataFrame) -> pl.DataFrame:
+    """Split 要素ID into its namespace prefix and local name."""
+    parts = pl.col("要素ID").str.extract_groups(
+        r"^(?P<prefix>.*):(?P<local_name>[^:]*)$"
+    )
+    return df.with_columns(
+        parts.struct.field("prefix").alias("prefix"),
+        parts.struct.field("local_name").alias("local_name"),
+    )
+
+
+# ユニットID of values typed as Int64 and as Float64
+INTEGER_UNITS = ["JPY", "shares"]
+FLOAT_UNITS = ["JPYPerShares", "pure"]
+# pure elements that are head counts (e.g. NumberOfEmployees) rather than ratios
+COUNT_ELEMENT_PATTERN = r":(?:Average)?NumberOf"
+
+
+def add_typed_values(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Add typed copies of 値 chosen by ユニットID.
+
+    整数値 (Int64) holds JPY amounts, share counts and head counts such as
+    NumberOfEmployees; 実数値 (Float64) holds per-share amounts and ratios.
+    Text values and placeholders such as ``－`` are null in both.
+    """
+    unit = pl.col("ユニットID")
+    is_count = (unit == "pure") & pl.col("要素ID").str.contains(COUNT_ELEMENT_PATTERN)
+    return df.with_columns(
+        pl.when(unit.is_in(INTEGER_UNITS) | is_count)
+        .then(pl.col("値").cast(pl.Int64, strict=False))
+        .alias("整数値"),
+        pl.when(unit.is_in(FLOAT_UNITS) & ~is_count)
+        .then(pl.col("値").cast(pl.Float64, strict=False))
+        .alias("実数値"),
+    )
+
+
+def typed_value(unit: str, raw, integer, real):
+    """Pick the Python value of one row of add_typed_values output."""
+    if integer is not None:
+        return integer
+    if real is not None:
+        return real
+    if unit in INTEGER_UNITS or unit in FLOAT_UNITS:
+        return None
+    return raw
+
+
+def extract_elements(
+    df: pl.DataFrame, categories: Iterable[str] | None = None
+) -> pl.DataFrame:
+    """
+    Match every row of the report against the element and context tables.
+
+    Returns one row per (sheet, element, year) for which exactly one
+    consolidated value exists, sorted in element table order. If categories
+    is given, only elements of those sheets are matched.
+    """
+    join_frame = ELEMENT_CATALOG.join_frame
+    if categories is not None:
+        join_frame = join_frame.filter(pl.col("sheet").is_in(list(categories)))
+    df = split_element_id(df)
+    df = df.filter(pl.col("local_name").is_in(join_frame["local_name"].implode()))
+    df = Parser.unique_element_list(df)
+    df = Parser.filter_by_consolidation(df)
+    df = df.join(CONTEXT_TABLE, on="コンテキストID", how="inner")
+    df = df.join(join_frame, on="local_name", how="inner")
+    df = add_typed_values(df)
+    return (
+        df.group_by(["sheet_order", "element_order", "year_order"])
+        .agg(
+            pl.col("sheet").first(),
+            pl.col("label").first(),
+            pl.col("year").first(),
+            pl.col("値").first(),
+            pl.col("ユニットID").first(),
+            pl.col("整数値").first(),
+            pl.col("実数値").first(),
+            pl.len().alias("count"),
+        )
+        .filter(pl.col("count") == 1)
+        .sort(["sheet_order", "element_order", "year_order"])
+    )
+
+
+def to_sheet_dicts(elements: pl.DataFrame, typed: bool = False) -> dict[str, dict]:
+    """
+    Build the per-sheet dictionaries from the output of extract_elements.
+
+    With typed, numeric values are ints or floats (None for placeholders)
+    instead of the raw strings.
+    """
+    financial_data = {sheet_name: {} for sheet_name in ELEMENT_CATALOG.sheet_names}
+    meta_values = {}
+    current_key = None
+    for (
+        sheet_name,
+        element_order,
+        label,
+        year,
+        value,
+        *typed_columns,
+    ) in elements.select(
+        ["sheet", "element_order", "label", "year", "値"]
+        + (["ユニットID", "整数値", "実数値"] if typed else [])
+    ).iter_rows():
+        if typed:
+            value = typed_value(typed_columns[0], value, *typed_columns[1:])
+        if sheet_name == "META":
+            # META has no year dimension; the latest year wins
+            meta_values[element_order] = (label, value)
+            continue
+        sheet_data = financial_data[sheet_name]
+        # A later element with the same label replaces the earlier one
+        if current_key != (sheet_name, element_order):
+            current_key = (sheet_name, element_order)
+            sheet_data[label] = {}
+        sheet_data[label][year] = value
+    for label, value in meta_values.values():
+        # An element whose value is empty is dropped rather than stored
+        if value:
+            financial_data["META"][label] = value
+    return financial_data
 
 
 def parse_tsv(
     file_path,
+    categories: Iterable[str] | None = None,
+    cache: ParseCache | None = None,
+    typed: bool = False,
 ) -> FinancialData | None:
     """
     Parse the TSV file and return a FinancialData object.
     Current implementation supports only consolidated reports.
+
+    categories limits extraction to the given sheets (e.g. ["BS", "PL"]);
+    the other sheets are left empty. META is always extracted because it
+    decides whether the report is consolidated.
+
+    With a cache, sheets already parsed from the same file content are
+    returned from it and only the missing or outdated sheets are parsed.
+
+    With typed, amounts and counts are returned as ints, per-share values and
+    ratios as floats and numeric placeholders as None (see add_typed_values).
     """
+    sheet_names = ELEMENT_CATALOG.sheet_names
+    if categories is not None:
+        categories = {"META", *categories}
+        unknown = categories - set(sheet_names)
+        if unknown:
+            raise ValueError(f"Unknown categories: {sorted(unknown)}")
+        sheet_names = [s for s in sheet_names if s in categories]
+
+    sheets = cache.get(file_path, sheet_names, typed) if cache is not None else {}
+    missing = [s for s in sheet_names if s not in sheets]
+    if missing:
+        df = read_report(file_path)
+        logger.info(f"Found {df.shape[0]} elements in {file_path}")
+        parsed = to_sheet_dicts(extract_elements(df, missing), typed)
+        parsed = {s: parsed[s] for s in missing}
+        if cache is not None:
+            cache.put(file_path, parsed, typed)
+        sheets.update(parsed)
+
+    if sheets["META"].get("連結決算の有無") == "false":
+        return None
+    financial_data = FinancialData(
+        meta=sheets["META"],
+        summary=sheets.get("SUMMARY", {}),
+        text=sheets.get("TEXT", {}),
+        bs=sheets.get("BS", {}),
+        pl=sheets.get("PL", {}),
+        cf=sheets.get("CF", {}),
+    )
+    return financial_data
 
-    parser = Parser()
-    df = pl.read_csv(
-        file_path, separator="\t", encoding="utf-16", infer_schema_length=0
+
+@dataclass
+class ParseResult:
+    file_path: str
+    data: FinancialData | None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _parse_one(
+    file_path: str,
+    categories: Iterable[str] | None = None,
+    cache: ParseCache | None = None,
+    typed: bool = False,
+) -> ParseResult:
+    try:
+        return ParseResult(file_path, parse_tsv(file_path, categories, cache, typed))
+    except Exception as e:
+        return ParseResult(file_path, None, f"{type(e).__name__}: {e}")
+
+
+def _parse_chunk(
+    file_paths: list[str],
+    categories: Iterable[str] | None = None,
+    cache: ParseCache | None = None,
+    typed: bool = False,
+) -> list[ParseResult]:
+    return [_parse_one(file_path, categories, cache, typed) for file_path in file_paths]
+
+
+def parse_many(
+    file_paths: Iterable[str],
+    workers: int | None = None,
+    chunksize: int = 1,
+    ordered: bool = True,
+    categories: Iterable[str] | None = None,
+    cache: ParseCache | None = None,
+    typed: bool = False,
+) -> Iterator[ParseResult]:
+    """
+    Parse many TSV files in a process pool.
+
+    Each worker builds the element catalog once, when it imports this module.
+    Results are yielded in input order when ``ordered`` is True, otherwise as
+    soon as each chunk completes. A file that fails to parse is reported as a
+    ParseResult with ``error`` set instead of raising. ``workers=1`` parses in
+    the current process. categories, cache and typed are passed on to
+    parse_tsv.
+    """
+    file_paths = [str(file_path) for file_path in file_paths]
+    if categories is not None:
+        categories = list(categories)
+    parse_one = partial(_parse_one, categories=categories, cache=cache, typed=typed)
+    if workers == 1:
+        yield from map(parse_one, file_paths)
+        return
+
+    # polars is multithreaded, so forking a process that has used it can
+    # deadlock; start workers from a clean interpreter instead.
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
     )
-    df = parser.unique_element_list(df)
-    logger.info(f"Found {df.shape[0]} unique elements in {file_path}")
-
-    financial_data = {}  # JSONデータのベース
-
-    sheet_name_map = {
-        "META": META,
-        "SUMMARY": SUMMARY,
-        "TEXT": TEXT,
-        "BS": BS,
-        "PL": PL,
-        "CF": CF,
-    }
-    for sheet_name, sheet in sheet_name_map.items():
-        if sheet_name == "META":
-            contain_year = False
+    try:
+        if ordered:
+            yield from executor.map(parse_one, file_paths, chunksize=chunksize)
         else:
-            contain_year = True
-        sheet_data = {}  # シートごとのデータを格納
+            futures = [
+                executor.submit(
+                    _parse_chunk,
+                    file_paths[i : i + chunksize],
+                    categories,
+                    cache,
+                    typed,
+                )
+                for i in range(0, len(file_paths), chunksize)
+            ]
+            for future in as_completed(futures):
+                yield from future.result()
+    finally:
+        # Stop queued work if the caller stops iterating early
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_parse_tsv():
+    financial_data = parse_tsv("data/E00304/S100ISXG.tsv")
+    assert financial_data.meta["EDINETコード"] == "E00304"
+    assert financial_data.summary["売上高"]["CurrentYear"] == "27225613000"
+    assert financial_data.bs["現金及び預金"] == {
+        "Prior1Year": "7014776000",
+        "CurrentYear": "8283630000",
+    }
 
-        elements = extract_leaf_elements(sheet)
 
-        for element in elements:
-            key, value = list(element.items())[0]
-            filtered_df = parser.filter_by_element_id(df, key)
-            filtered_df = parser.filter_by_consolidation(filtered_df)
-            result = parser.to_dict(filtered_df, value, contain_year)
-            sheet_data.update(result)
+def test_parse_many():
+    file_paths = ["data/E00304/S100ISXG.tsv", "data/missing.tsv"]
+    results = list(parse_many(file_paths, workers=2))
+    assert [result.file_path for result in results] == file_paths
+    assert results[0].ok
+    assert results[0].data.meta["EDINETコード"] == "E00304"
+    assert not results[1].ok
 
-        financial_data[sheet_name] = sheet_data  # JSONデータに追加
-    if financial_data["META"].get("連結決算の有無") == "false":
-        return None
-    financial_data = FinancialData(
-        meta=financial_data["META"],
-        summary=financial_data["SUMMARY"],
-        text=financial_data["TEXT"],
-        bs=financial_data["BS"],
-        pl=financial_data["PL"],
-        cf=financial_data["CF"],
+
+def test_parse_tsv_categories():
+    financial_data = parse_tsv("data/E00304/S100ISXG.tsv", categories=["BS"])
+    assert financial_data.meta["EDINETコード"] == "E00304"
+    assert financial_data.bs == parse_tsv("data/E00304/S100ISXG.tsv").bs
+    assert financial_data.pl == {}
+    assert financial_data.text == {}
+
+
+def test_parse_tsv_cache(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache.sqlite"))
+    expected = parse_tsv("data/E00304/S100ISXG.tsv")
+    assert parse_tsv("data/E00304/S100ISXG.tsv", cache=cache) == expected
+    assert parse_tsv("data/E00304/S100ISXG.tsv", cache=cache) == expected
+
+
+def test_parse_tsv_typed():
+    financial_data = parse_tsv("data/E00304/S100ISXG.tsv", typed=True)
+    assert financial_data.meta["EDINETコード"] == "E00304"
+    assert financial_data.summary["売上高"]["CurrentYear"] == 27225613000
+    assert financial_data.bs["現金及び預金"] == {
+        "Prior1Year": 7014776000,
+        "CurrentYear": 8283630000,
+    }
+    assert isinstance(financial_data.summary["自己資本比率"]["CurrentYear"], float)
+    assert isinstance(financial_data.summary["従業員数"]["CurrentYear"], int)
+
+
+def test_add_typed_values():
+    df = add_typed_values(
+        pl.DataFrame(
+            {
+                "要素ID": [
+                    "jppfs_cor:CashAndDeposits",
+                    "jpcrp_cor:NumberOfEmployees",
+                    "jpcrp_cor:EquityToAssetRatioSummaryOfBusinessResults",
+                    "jpcrp_cor:DividendPaidPerShareSummaryOfBusinessResults",
+                    "jppfs_cor:CashAndDeposits",
+                    "jpdei_cor:EDINETCodeDEI",
+                ],
+                "ユニットID": ["JPY", "pure", "pure", "JPYPerShares", "JPY", "－"],
+                "値": ["-1200", "2400", "0.241", "30.00", "－", "E00304"],
+            }
+        )
     )
-    return financial_data
+    assert df["整数値"].to_list() == [-1200, 2400, None, None, None, None]
+    assert df["実数値"].to_list() == [None, None, 0.241, 30.0, None, None]
 
 
 def parse_args():
@@ -172,6 +439,7 @@ def parse_args():
         nargs="+",
         help="Category to parse",
         choices=["META", "SUMMARY", "BS", "PL", "CF", "TEXT"],
+        default=["META", "SUMMARY", "BS", "PL", "CF", "TEXT"],
     )
     parser.add_argument(
         "--output_path",
@@ -179,14 +447,20 @@ def parse_args():
         default="parsed_output.json",
         help="Path to save the output JSON",
     )
+    parser.add_argument(
+        "--typed",
+        action="store_true",
+        help="Output numeric values as numbers instead of strings",
+    )
     return parser.parse_args()
 
 
-
 if __name__ == "__main__":
     args = parse_args()
 
-    financial_data = parse_tsv(args.file_path)
+    financial_data = parse_tsv(
+        args.file_path, categories=args.category_list, typed=args.typed
+    )
 
     output_dict = {}
 
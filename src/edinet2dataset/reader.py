@@ -0,0 +1,268 @@
+import argparse
+import csv
+import glob
+import multiprocessing
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import polars as pl
+from loguru import logger
+from tqdm import tqdm
+
+# Low-cardinality columns stored dictionary-encoded in the Parquet sidecar
+DICTIONARY_COLUMNS = [
+    "要素ID",
+    "項目名",
+    "コンテキストID",
+    "相対年度",
+    "連結・個別",
+    "期間・時点",
+    "ユニットID",
+    "単位",
+]
+
+
+def sidecar_path(file_path) -> Path:
+    """Return the Parquet sidecar path of a TSV report."""
+    return Path(file_path).with_suffix(".parquet")
+
+
+def read_tsv(file_path) -> pl.DataFrame:
+    """Read a raw EDINET TSV report with every column as a string."""
+    return pl.read_csv(
+        file_path, separator="\t", encoding="utf-16", infer_schema_length=0
+    )
+
+
+def has_fresh_sidecar(file_path) -> bool:
+    """Whether a sidecar exists and is not older than its TSV."""
+    parquet_path = sidecar_path(file_path)
+    if not parquet_path.exists():
+        return False
+    if not os.path.exists(file_path):
+        return True
+    return parquet_path.stat().st_mtime >= os.stat(file_path).st_mtime
+
+
+def convert_to_parquet(file_path, overwrite: bool = False) -> Path:
+    """
+    Write the Parquet sidecar of a TSV report next to it.
+
+    The write goes through a temporary file so readers never see a partial
+    sidecar.
+    """
+    parquet_path = sidecar_path(file_path)
+    if not overwrite and has_fresh_sidecar(file_path):
+        return parquet_path
+    df = read_tsv(file_path).with_columns(
+        pl.col(column).cast(pl.Categorical) for column in DICTIONARY_COLUMNS
+    )
+    tmp_path = parquet_path.with_suffix(f".parquet.{os.getpid()}.tmp")
+    df.write_parquet(tmp_path, compression="zstd")
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+
+def read_report(file_path, columns: list[str] | None = None) -> pl.DataFrame:
+    """
+    Read a report, preferring its Parquet sidecar over the UTF-16 TSV.
+
+    file_path may point at either the TSV or the sidecar. Columns are
+    returned as strings, exactly as read_tsv would.
+    """
+    if Path(file_path).suffix == ".parquet" or has_fresh_sidecar(file_path):
+        df = pl.read_parquet(sidecar_path(file_path), columns=columns, memory_map=True)
+        return df.with_columns(pl.col(pl.Categorical).cast(pl.String))
+    df = read_tsv(file_path)
+    return df.select(columns) if columns is not None else df
+
+
+def iter_tsv_rows(file_path) -> Iterator[list[str]]:
+    """
+    Yield the rows of a TSV report, header first.
+
+    The UTF-16 file is decoded incrementally, so a caller that stops
+    iterating early only reads the beginning of the file.
+    """
+    with open(file_path, encoding="utf-16", newline="") as f:
+        yield from csv.reader(f, delimiter="\t")
+
+
+def iter_matching_lines(
+    file_path, prefixes: Iterable[str], element_ids: Iterable[str] | None = None
+) -> Iterator[str]:
+    """
+    Yield the header and the lines of a TSV report whose 要素ID has one of
+    the namespace prefixes and, if given, one of the local names.
+
+    The decoded text is searched for the line starts (``\n"jpdei_cor:``)
+    instead of splitting and parsing every row, so only the matching lines
+    reach the CSV parser. Values in EDINET TSVs contain no line breaks, so
+    every row is one line.
+    """
+    text = Path(file_path).read_bytes().decode("utf-16")
+    element_ids = set(element_ids) if element_ids is not None else None
+
+    def line_end(pos: int) -> int:
+        end = text.find("\n", pos)
+        return len(text) if end == -1 else end
+
+    yield text[: line_end(0)]
+    hits = []
+    for prefix in set(prefixes):
+        needle = f'\n"{prefix}:'
+        pos = text.find(needle)
+        while pos != -1:
+            name_start = pos + len(needle)
+            if (
+                element_ids is None
+                or text[name_start : text.find('"', name_start)] in element_ids
+            ):
+                hits.append(pos + 1)
+            pos = text.find(needle, name_start)
+    for pos in sorted(hits):
+        yield text[pos : line_end(pos)]
+
+
+def _element_filter(
+    prefixes: Iterable[str] | None, element_ids: Iterable[str] | None
+) -> pl.Expr:
+    parts = pl.col("要素ID").str.extract_groups(
+        r"^(?P<prefix>.*):(?P<local_name>[^:]*)$"
+    )
+    predicate = pl.lit(True)
+    if prefixes is not None:
+        predicate &= parts.struct.field("prefix").is_in(list(prefixes))
+    if element_ids is not None:
+        predicate &= parts.struct.field("local_name").is_in(list(element_ids))
+    return predicate
+
+
+def read_elements(
+    file_path,
+    prefixes: Iterable[str] | None = None,
+    element_ids: Iterable[str] | None = None,
+    stop_early: bool = False,
+) -> pl.DataFrame:
+    """
+    Read only the rows of a report whose 要素ID matches the given namespace
+    prefixes (e.g. ``jpdei_cor``) and local names (e.g. ``EDINETCodeDEI``).
+
+    With prefixes, the matching lines are located by a text search and only
+    those are parsed (see iter_matching_lines), which is about twice as fast
+    as reading the whole report. Without
+    them, the TSV is streamed and filtered row by row; with stop_early,
+    reading then stops at the first non-matching row after every element in
+    element_ids has been seen. That is exact for elements listed together,
+    such as the jpdei_cor cover items, but the DEI block sits in the middle
+    of a report, so most of the file is still decoded. If a fresh Parquet
+    sidecar exists the filter is pushed down into the Parquet scan instead.
+    """
+    if has_fresh_sidecar(file_path):
+        return (
+            pl.scan_parquet(sidecar_path(file_path))
+            .with_columns(pl.col(pl.Categorical).cast(pl.String))
+            .filter(_element_filter(prefixes, element_ids))
+            .collect()
+        )
+
+    prefixes = set(prefixes) if prefixes is not None else None
+    element_ids = set(element_ids) if element_ids is not None else None
+    remaining = set(element_ids) if element_ids is not None else set()
+    if prefixes is not None:
+        lines = iter_matching_lines(file_path, prefixes, element_ids)
+        rows = csv.reader(lines, delimiter="\t")
+    else:
+        lines = rows = iter_tsv_rows(file_path)
+    header = next(rows)
+    matched = []
+    for row in rows:
+        prefix, _, local_name = row[0].rpartition(":")
+        if (prefixes is None or prefix in prefixes) and (
+            element_ids is None or local_name in element_ids
+        ):
+            matched.append(row)
+            remaining.discard(local_name)
+        elif stop_early and element_ids is not None and not remaining:
+            break
+    lines.close()
+    return pl.DataFrame(
+        matched, schema={column: pl.String for column in header}, orient="row"
+    )
+
+
+def _convert_one(file_path: str, overwrite: bool = False) -> str | None:
+    try:
+        convert_to_parquet(file_path, overwrite)
+    except Exception as e:
+        return f"{file_path}: {type(e).__name__}: {e}"
+    return None
+
+
+def test_read_report(tmp_path):
+    tsv_path = tmp_path / "S100ISXG.tsv"
+    tsv_path.write_bytes(Path("data/E00304/S100ISXG.tsv").read_bytes())
+    expected = read_report(tsv_path)
+    assert not has_fresh_sidecar(tsv_path)
+
+    convert_to_parquet(tsv_path)
+    assert has_fresh_sidecar(tsv_path)
+    assert read_report(tsv_path).equals(expected)
+    assert read_report(tsv_path, columns=["要素ID", "値"]).equals(
+        expected.select(["要素ID", "値"])
+    )
+
+
+def test_read_elements(tmp_path):
+    tsv_path = tmp_path / "S100ISXG.tsv"
+    tsv_path.write_bytes(Path("data/E00304/S100ISXG.tsv").read_bytes())
+    df = read_tsv(tsv_path)
+    assert read_elements(tsv_path).equals(df)
+
+    dei = df.filter(pl.col("要素ID").str.starts_with("jpdei_cor:"))
+    assert read_elements(tsv_path, prefixes=["jpdei_cor"]).equals(dei)
+
+    edinet_code = read_elements(
+        tsv_path, ["jpdei_cor"], ["EDINETCodeDEI"], stop_early=True
+    )
+    assert edinet_code["値"].to_list() == ["E00304"]
+    assert read_elements(tsv_path, element_ids=["EDINETCodeDEI"]).equals(edinet_code)
+    summary = df.filter(pl.col("要素ID").str.starts_with("jpcrp_cor:"))
+    assert read_elements(tsv_path, ["jpcrp_cor"]).equals(summary)
+
+    convert_to_parquet(tsv_path)
+    assert read_elements(tsv_path, prefixes=["jpdei_cor"]).equals(dei)
+    assert read_elements(tsv_path, element_ids=["EDINETCodeDEI"]).equals(edinet_code)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser("Convert TSV reports to Parquet sidecars")
+    parser.add_argument("--input_dir", type=str, default="edinet_corpus")
+    parser.add_argument("--max_workers", type=int, default=None)
+    parser.add_argument(
+        "--overwrite", action="store_true", help="Rewrite existing sidecars"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    tsv_files = glob.glob(os.path.join(args.input_dir, "**", "*.tsv"), recursive=True)
+    if not args.overwrite:
+        tsv_files = [f for f in tsv_files if not has_fresh_sidecar(f)]
+    logger.info(f"Converting {len(tsv_files)} TSV files")
+
+    with ProcessPoolExecutor(
+        max_workers=args.max_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        for error in tqdm(
+            executor.map(
+                partial(_convert_one, overwrite=args.overwrite), tsv_files, chunksize=16
+            ),
+            total=len(tsv_files),
+        ):
+            if error:
+                logger.error(f"Failed to convert {error}")
@@ -0,0 +1,232 @@
+import contextlib
+import random
+import threading
+import time
+from collections.abc import Callable, Iterator
+
+import requests
+from loguru import logger
+
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing rate requests per second on average."""
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate: float) -> None:
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+
+class RequestScheduler:
+    """
+    Send every EDINET request through one rate limit and retry policy.
+
+    Requests are throttled by a token bucket and by a concurrency limit.
+    Both adapt to the service: a 429, a 5xx or a timeout halves the
+    concurrency limit and the rate, while fast successful responses raise
+    them again step by step up to max_concurrency and max_rate (AIMD). Failed
+    attempts are retried with exponential backoff and full jitter, honouring
+    Retry-After. Any other error status is raised instead of being returned.
+    """
+
+    def __init__(
+        self,
+        max_rate: float = 10.0,
+        min_rate: float = 0.5,
+        max_concurrency: int = 16,
+        target_latency: float = 2.0,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(max_rate)
+        self.concurrency = float(max_concurrency)
+        self._active = 0
+        self._condition = threading.Condition()
+
+    def _enter(self) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self._active < int(self.concurrency))
+            self._active += 1
+        self.bucket.acquire()
+
+    def _exit(self) -> None:
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def _on_success(self, latency: float) -> None:
+        if latency > self.target_latency:
+            return
+        with self._condition:
+            # Additive increase: about +1 slot per round of concurrent requests
+            self.concurrency = min(
+                self.max_concurrency, self.concurrency + 1 / self.concurrency
+            )
+            self._condition.notify_all()
+        self.bucket.set_rate(min(self.max_rate, self.bucket.rate * 1.05))
+
+    def _on_throttle(self) -> None:
+        with self._condition:
+            self.concurrency = max(1.0, self.concurrency / 2)
+        self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+
+    def backoff(self, attempt: int, retry_after: str | None = None) -> float:
+        """Seconds to wait before retry number attempt (0-based)."""
+        if retry_after is not None and retry_after.isdigit():
+            return min(self.backoff_max, float(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _send(
+        self, send: Callable[..., requests.Response], url: str, **kwargs
+    ) -> requests.Response:
+        """
+        Call send(url, **kwargs) under the rate limit and retry policy and
+        return the successful response. Its concurrency slot is still held
+        and must be released with _exit().
+        """
+        for attempt in range(self.max_retries + 1):
+            self._enter()
+            start = time.monotonic()
+            try:
+                res = send(url, **kwargs)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                self._exit()
+                error, retry_after = e, None
+            except BaseException:
+                self._exit()
+                raise
+            else:
+                if res.status_code not in RETRY_STATUS:
+                    self._on_success(time.monotonic() - start)
+                    try:
+                        res.raise_for_status()
+                    except requests.HTTPError:
+                        res.close()
+                        self._exit()
+                        raise
+                    return res
+                error = requests.HTTPError(f"{res.status_code} for {url}", response=res)
+                retry_after = res.headers.get("Retry-After")
+                res.close()
+                self._exit()
+
+            self._on_throttle()
+            if attempt == self.max_retries:
+                raise error
+            wait = self.backoff(attempt, retry_after)
+            logger.warning(f"{error}; retrying in {wait:.1f}s")
+            time.sleep(wait)
+        raise AssertionError("unreachable")
+
+    def request(
+        self, send: Callable[..., requests.Response], url: str, **kwargs
+    ) -> requests.Response:
+        """
+        Call send(url, **kwargs), e.g. session.get, under the rate limit and
+        retry policy, and return the successful response.
+        """
+        res = self._send(send, url, **kwargs)
+        self._exit()
+        return res
+
+    @contextlib.contextmanager
+    def stream(
+        self, send: Callable[..., requests.Response], url: str, **kwargs
+    ) -> Iterator[requests.Response]:
+        """
+        Like request() with stream=True, but the concurrency slot is held
+        until the body has been read and the response is closed.
+        """
+        res = self._send(send, url, stream=True, **kwargs)
+        try:
+            with res:
+                yield res
+        finally:
+            self._exit()
+
+
+def test_request_scheduler():
+    class FakeResponse:
+        def __init__(self, status_code):
+            self.status_code = status_code
+            self.headers = {"Retry-After": "0"}
+            self.closed = False
+
+        def raise_for_status(self):
+            if self.status_code >= 400:
+                raise requests.HTTPError(str(self.status_code))
+
+        def close(self):
+            self.closed = True
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            self.close()
+
+    statuses = [503, 429, 200]
+    scheduler = RequestScheduler(max_rate=1000, max_concurrency=4)
+    res = scheduler.request(lambda url: FakeResponse(statuses.pop(0)), "url")
+    assert res.status_code == 200
+    # 4 halved twice by the throttled attempts, then +1 for the fast success
+    assert scheduler.concurrency == 2
+
+    scheduler = RequestScheduler(max_rate=1000, max_retries=1)
+    try:
+        scheduler.request(lambda url: FakeResponse(503), "url")
+    except requests.HTTPError:
+        pass
+    else:
+        raise AssertionError("expected HTTPError")
+
+    responses = []
+
+    def send(url, status_code=200, stream=False):
+        responses.append(FakeResponse(status_code))
+        return responses[-1]
+
+    try:
+        scheduler.request(send, "url", status_code=404)
+    except requests.HTTPError as e:
+        assert str(e) == "404"
+    else:
+        raise AssertionError("expected HTTPError")
+    assert responses[-1].closed and scheduler._active == 0
+
+    with scheduler.stream(send, "url") as res:
+        # The slot covers the body of a streamed response
+        assert scheduler._active == 1
+    assert res.closed and scheduler._active == 0
@@ -1,4 +1,6 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
+
+import polars as pl
 
 
 @dataclass
@@ -35,7 +37,7 @@ class Metadata:
 
 
 # e.g. {'seqNumber': 1, 'docID': 'S100UKYJ', 'edinetCode': 'E01428', 'secCode': '79390', 'JCN': '9240001003119', 'filerName': '株式会社研創', 'fundCode': None, 'ordinanceCode': '010', 'formCode': '043A00', 'docTypeCode': '160', 'periodStart': '2024-04-01', 'periodEnd': '2025-03-31', 'submitDateTime': '2024-11-01 09:00', 'docDescription': '半期報告書－第54期(2024/04/01－2025/03/31)', 'issuerEdinetCode': None, 'subjectEdinetCode': None, 'subsidiaryEdinetCode': None, 'currentReportReason': None, 'parentDocID': None, 'opeDateTime': None, 'withdrawalStatus': '0', 'docInfoEditStatus': '0', 'disclosureStatus': '0', 'xbrlFlag': '1', 'pdfFlag': '1', 'attachDocFlag': '0', 'englishDocFlag': '0', 'csvFlag': '1', 'legalStatus': '1'}
-@dataclass
+@dataclass(slots=True)
 class Result:
     seqNumber: int
     docID: str
@@ -72,7 +74,57 @@ class Result:
         return cls(**json_data)
 
     def to_dict(self):
-        return asdict(self)
+        # Every field is a scalar, so a shallow copy is enough
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+RESULT_SCHEMA = {
+    field.name: pl.Int64 if field.name == "seqNumber" else pl.String
+    for field in fields(Result)
+}
+
+# Document kind of each (ordinanceCode, formCode) pair
+DOC_TYPES = {
+    ("010", "030000"): "annual",
+    ("010", "030001"): "annual_amended",
+    ("010", "043000"): "quarterly",
+    ("010", "043001"): "quarterly_amended",
+    ("010", "043A00"): "semiannual",
+    ("010", "043A01"): "semiannual_amended",
+}
+
+
+def register_doc_type(ordinance_code: str, form_code: str, doc_type: str) -> None:
+    """Name another document kind, e.g. extraordinary or large shareholding reports."""
+    DOC_TYPES[(ordinance_code, form_code)] = doc_type
+
+
+def get_doc_type(ordinance_code: str, form_code: str) -> str:
+    return DOC_TYPES.get((ordinance_code, form_code), "unknown")
+
+
+def doc_type_expr() -> pl.Expr:
+    """Expression computing the doc_type column from DOC_TYPES."""
+    return (
+        pl.concat_str(["ordinanceCode", "formCode"], separator="/")
+        .replace_strict(
+            {
+                f"{ordinance}/{form}": name
+                for (ordinance, form), name in DOC_TYPES.items()
+            },
+            default="unknown",
+            return_dtype=pl.String,
+        )
+        .alias("doc_type")
+    )
+
+
+def decode_results(rows: list[dict]) -> pl.DataFrame:
+    """
+    Decode the results array of a documents.json listing into a typed frame
+    with a derived doc_type column, without building a Result per row.
+    """
+    return pl.from_dicts(rows, schema=RESULT_SCHEMA).with_columns(doc_type_expr())
 
 
 def test_result():
@@ -110,6 +162,25 @@ def test_result():
     result_obj = Result.from_json(result)
     result_dict = result_obj.to_dict()
     assert result_dict["seqNumber"] == 1
+    assert not hasattr(result_obj, "__dict__")
+
+
+def test_decode_results():
+    row = dict.fromkeys(RESULT_SCHEMA)
+    rows = [
+        {**row, "seqNumber": 1, "ordinanceCode": "010", "formCode": "030000"},
+        {**row, "seqNumber": 2, "ordinanceCode": "060", "formCode": "010000"},
+    ]
+    df = decode_results(rows)
+    assert df.schema["seqNumber"] == pl.Int64
+    assert df["doc_type"].to_list() == ["annual", "unknown"]
+
+    register_doc_type("060", "010000", "large_shareholding")
+    try:
+        assert decode_results(rows)["doc_type"][1] == "large_shareholding"
+        assert get_doc_type("060", "010000") == "large_shareholding"
+    finally:
+        del DOC_TYPES[("060", "010000")]
 
 
 # API response when type 2 is specified
@@ -121,3 +192,8 @@ class Response:
     def __init__(self, json_data):
         self.metadata = Metadata(json_data)
         self.results = [Result.from_json(result) for result in json_data["results"]]
+
+    @staticmethod
+    def to_frame(json_data) -> pl.DataFrame:
+        """Decode the results of a response straight into a frame."""
+        return decode_results(json_data.get("results") or [])